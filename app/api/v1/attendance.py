@@ -1,14 +1,24 @@
 # app/api/v1/attendance.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, distinct, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 import datetime 
 from datetime import date
-from typing import List, Optional
+from typing import List, Literal, Optional
 import pytz
 
-from app.db.database import get_db
+from app.db.database import get_async_db, dialect_insert
 from app.db import models, schemas
-from app.core.security import get_current_user
+from app.core.security import Principal, get_current_user
+from app.utils.shift_schedule import shift_schedule
+from app.utils.pagination import Page
+from app.utils.fast_json import rows_response, schema_columns
+from app.utils.table_versions import conditional_get
+from app.utils.attendance_export import export_query, stream_attendance_export
+from app.utils.attendance_rollup import NO_GYM, rollup_delta, status_delta
+from app.utils.attendance_import import parse_import_body, validate_import_rows
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -25,42 +35,93 @@ def time_to_string(time_obj):
         return time_obj.strftime("%H:%M:%S")
     return None
 
-def get_current_shift(db: Session):
+async def get_current_shift(db: AsyncSession):
     """Get current active shift based on Indian time"""
     current_time = get_current_indian_time().time()
-    
-    shift = db.query(models.Shift).filter(
-        models.Shift.is_active == True,
-        models.Shift.start_time <= current_time,
-        models.Shift.end_time >= current_time
-    ).first()
-    
-    return shift
+    return (await shift_schedule.ensure_loaded_async(db)).find(current_time)
 
-def get_shift_by_time(check_time: datetime.time, db: Session):
+async def get_shift_by_time(check_time: datetime.time, db: AsyncSession):
     """Get shift for a specific time"""
-    shift = db.query(models.Shift).filter(
-        models.Shift.is_active == True,
-        models.Shift.start_time <= check_time,
-        models.Shift.end_time >= check_time
-    ).first()
+    return (await shift_schedule.ensure_loaded_async(db)).find(check_time)
+
+ATTENDANCE_KEY = ["user_id", "attendance_date", "shift_id"]
+# Sort key for attendance lists: newest date first, id breaks ties
+ATTENDANCE_PAGE_KEYS = [models.Attendance.attendance_date, models.Attendance.id]
+# List endpoints select the schema's columns and skip per-row validation
+ATTENDANCE_COLUMNS = schema_columns(models.Attendance, schemas.Attendance)
+
+async def upsert_time_in(db: AsyncSession, user_id: int, gym_id: int, shift_id: int, attendance_date: date, time_in: datetime.datetime):
+    """Record time-in and its rollup delta with a single INSERT ... ON CONFLICT statement.
+    
+    Inserts a present row, or fills time_in on an existing absent row that
+    has none (e.g. one created by the nightly absence job). The rollup needs
+    the status a row had before, which RETURNING can't show, so the update
+    is limited to absent rows and created_at tells the two cases apart: it
+    only equals this call's timestamp on a row the call inserted. A row
+    without a time-in but with another status (set by an admin) is filled
+    by a second, status-checked UPDATE. Returns the row and whether this
+    call recorded the time-in; an existing time-in is left untouched.
+    """
+    attendance_table = models.Attendance.__table__
+    now = datetime.datetime.utcnow()
+    key = and_(
+        attendance_table.c.user_id == user_id,
+        attendance_table.c.attendance_date == attendance_date,
+        attendance_table.c.shift_id == shift_id
+    )
     
-    return shift
+    stmt = dialect_insert(db)(attendance_table).values(
+        user_id=user_id,
+        shift_id=shift_id,
+        attendance_date=attendance_date,
+        time_in=time_in,
+        status='P',
+        timeout_default=False,
+        created_at=now,
+        updated_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=ATTENDANCE_KEY,
+        set_={"time_in": stmt.excluded.time_in, "status": 'P', "updated_at": now},
+        where=and_(attendance_table.c.time_in.is_(None), attendance_table.c.status == 'A')
+    ).returning(*attendance_table.c)
+    
+    recorded = (await db.execute(stmt)).first()
+    if recorded is not None:
+        old_status = None if recorded.created_at == now else 'A'
+    else:
+        existing = (await db.execute(select(attendance_table).where(key))).first()
+        if existing.time_in is not None:
+            return existing, False
+        
+        old_status = existing.status
+        recorded = (await db.execute(
+            update(attendance_table).where(
+                key, attendance_table.c.time_in.is_(None), attendance_table.c.status == old_status
+            ).values(
+                time_in=time_in, status='P', updated_at=now
+            ).returning(*attendance_table.c)
+        )).first()
+        if recorded is None:
+            # Another tap filled it in between
+            return (await db.execute(select(attendance_table).where(key))).first(), False
+    
+    rollup = rollup_delta(db, attendance_date, shift_id, gym_id=gym_id, **status_delta(old_status, 'P'))
+    if rollup is not None:
+        await db.execute(rollup)
+    return recorded, True
 
 @router.post("/attendance/time-in", response_model=schemas.AttendanceResponse)
 async def record_time_in(
     attendance_data: schemas.AttendanceCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     # Use current date if not provided
     attendance_date = attendance_data.attendance_date or get_current_indian_time().date()
     
     # Check if shift exists and is active
-    shift = db.query(models.Shift).filter(
-        models.Shift.id == attendance_data.shift_id,
-        models.Shift.is_active == True
-    ).first()
+    shift = (await shift_schedule.ensure_loaded_async(db)).get(attendance_data.shift_id)
     
     if not shift:
         raise HTTPException(
@@ -68,57 +129,189 @@ async def record_time_in(
             detail="Selected shift is not available"
         )
     
-    # Check if attendance already exists for today and shift
-    existing_attendance = db.query(models.Attendance).filter(
-        models.Attendance.user_id == current_user.id,
-        models.Attendance.attendance_date == attendance_date,
-        models.Attendance.shift_id == attendance_data.shift_id
-    ).first()
-    
-    current_time = get_current_indian_time()
-    
-    if existing_attendance:
-        if existing_attendance.time_in:
-            return {
-                "message": "Time-in already recorded for this shift",
-                "attendance": existing_attendance,
-                "already_recorded": True
-            }
-        else:
-            # Update existing record with time_in
-            existing_attendance.time_in = current_time
-            existing_attendance.status = 'P'
-            db.commit()
-            db.refresh(existing_attendance)
-            
-            return {
-                "message": "Time-in recorded successfully",
-                "attendance": existing_attendance
+    attendance, recorded = await upsert_time_in(
+        db,
+        user_id=current_user.id,
+        gym_id=current_user.gym_id,
+        shift_id=attendance_data.shift_id,
+        attendance_date=attendance_date,
+        # Columns are naive IST timestamps; asyncpg rejects aware values for them
+        time_in=get_current_indian_time().replace(tzinfo=None)
+    )
+    await db.commit()
+    
+    if not recorded:
+        return {
+            "message": "Time-in already recorded for this shift",
+            "attendance": attendance,
+            "already_recorded": True
+        }
+    
+    return {
+        "message": "Time-in recorded successfully",
+        "attendance": attendance
+    }
+
+async def upsert_time_in_batch(db: AsyncSession, members, shift_id: int, attendance_date: date, time_in: datetime.datetime):
+    """Batch form of upsert_time_in for a list of (user_id, gym_id) members.
+    
+    One multi-row INSERT ... ON CONFLICT DO NOTHING covers everyone without a
+    row yet. Members who already have one are read in one query, and those
+    without a time-in are filled by one conditional UPDATE. Rollup deltas
+    are applied per gym. Returns {user_id: (attendance_id, recorded)}.
+    """
+    attendance_table = models.Attendance.__table__
+    now = datetime.datetime.utcnow()
+    gym_by_user = dict(members)
+    outcome = {}
+    
+    inserted = (await db.execute(
+        dialect_insert(db)(attendance_table).values([
+            {
+                "user_id": user_id,
+                "shift_id": shift_id,
+                "attendance_date": attendance_date,
+                "time_in": time_in,
+                "status": 'P',
+                "timeout_default": False,
+                "created_at": now,
+                "updated_at": now
             }
-    else:
-        # Create new attendance record
-        attendance = models.Attendance(
-            user_id=current_user.id,
-            shift_id=attendance_data.shift_id,
-            attendance_date=attendance_date,
-            time_in=current_time,
-            status='P'
+            for user_id in gym_by_user
+        ]).on_conflict_do_nothing(index_elements=ATTENDANCE_KEY).returning(
+            attendance_table.c.id, attendance_table.c.user_id
         )
+    )).all()
+    transitions = [(row.user_id, None) for row in inserted]
+    outcome.update({row.user_id: (row.id, True) for row in inserted})
+    
+    conflicted = [user_id for user_id in gym_by_user if user_id not in outcome]
+    if conflicted:
+        same_slot = and_(
+            attendance_table.c.user_id.in_(conflicted),
+            attendance_table.c.attendance_date == attendance_date,
+            attendance_table.c.shift_id == shift_id
+        )
+        existing = (await db.execute(
+            select(attendance_table.c.id, attendance_table.c.user_id, attendance_table.c.status, attendance_table.c.time_in).where(same_slot)
+        )).all()
+        old_status = {row.user_id: row.status for row in existing if row.time_in is None}
+        outcome.update({row.user_id: (row.id, False) for row in existing})
         
-        db.add(attendance)
-        db.commit()
-        db.refresh(attendance)
-        
-        return {
-            "message": "Time-in recorded successfully",
-            "attendance": attendance
-        }
+        if old_status:
+            filled = (await db.execute(
+                update(attendance_table).where(
+                    same_slot,
+                    attendance_table.c.user_id.in_(old_status),
+                    attendance_table.c.time_in.is_(None)
+                ).values(
+                    time_in=time_in, status='P', updated_at=now
+                ).returning(attendance_table.c.id, attendance_table.c.user_id)
+            )).all()
+            transitions += [(row.user_id, old_status[row.user_id]) for row in filled]
+            outcome.update({row.user_id: (row.id, True) for row in filled})
+    
+    deltas = {}
+    for user_id, previous in transitions:
+        delta = deltas.setdefault(gym_by_user[user_id], {"present": 0, "absent": 0})
+        for counter, change in status_delta(previous, 'P').items():
+            delta[counter] += change
+    for gym_id, delta in deltas.items():
+        rollup = rollup_delta(db, attendance_date, shift_id, gym_id=gym_id, **delta)
+        if rollup is not None:
+            await db.execute(rollup)
+    
+    return outcome
+
+@router.post("/attendance/kiosk/check-in", response_model=schemas.KioskCheckInResponse)
+async def record_kiosk_check_in(
+    check_in: schemas.KioskCheckIn,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Record time-in for a burst of member scans at the front desk in one transaction"""
+    if not current_user.is_owner and not current_user.is_trainer:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only owners and trainers can run kiosk check-in"
+        )
+    
+    requested = len(check_in.user_ids) + len(check_in.member_ids)
+    if requested == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide user_ids or member_ids"
+        )
+    if requested > settings.KIOSK_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.KIOSK_BATCH_MAX} members per check-in"
+        )
+    
+    schedule = await shift_schedule.ensure_loaded_async(db)
+    if check_in.shift_id is not None:
+        shift = schedule.get(check_in.shift_id)
+    else:
+        shift = schedule.find(get_current_indian_time().time())
+    if not shift:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Selected shift is not available"
+        )
+    attendance_date = check_in.attendance_date or get_current_indian_time().date()
+    
+    # Resolve every scan, by id or by card number, in one query
+    users = (await db.execute(
+        select(models.User.id, models.User.member_id, models.User.gym_id, models.User.is_active).where(
+            or_(models.User.id.in_(check_in.user_ids), models.User.member_id.in_(check_in.member_ids))
+        )
+    )).all()
+    by_id = {user.id: user for user in users}
+    by_member_id = {user.member_id: user for user in users}
+    
+    scans = [(by_id.get(user_id), user_id, None) for user_id in check_in.user_ids]
+    scans += [(by_member_id.get(member_id), None, member_id) for member_id in check_in.member_ids]
+    
+    members = {user.id: user.gym_id or NO_GYM for user, _, _ in scans if user is not None and user.is_active}
+    outcome = {}
+    if members:
+        outcome = await upsert_time_in_batch(
+            db, members.items(), shift.id, attendance_date, get_current_indian_time().replace(tzinfo=None)
+        )
+        await db.commit()
+    
+    results = []
+    seen = set()
+    for user, user_id, member_id in scans:
+        if user is None:
+            results.append({"user_id": user_id, "member_id": member_id, "result": "not_found"})
+            continue
+        if not user.is_active:
+            results.append({"user_id": user.id, "member_id": user.member_id, "result": "inactive"})
+            continue
+        attendance_id, recorded = outcome[user.id]
+        # A card scanned twice in the same burst is only recorded once
+        recorded = recorded and user.id not in seen
+        seen.add(user.id)
+        results.append({
+            "user_id": user.id,
+            "member_id": user.member_id,
+            "result": "recorded" if recorded else "already_recorded",
+            "attendance_id": attendance_id
+        })
+    
+    return {
+        "shift_id": shift.id,
+        "attendance_date": attendance_date,
+        "recorded": sum(1 for result in results if result["result"] == "recorded"),
+        "results": results
+    }
 
 @router.post("/attendance/time-out", response_model=schemas.AttendanceResponse)
 async def record_time_out(
     attendance_data: schemas.AttendanceUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     current_date = get_current_indian_time().date()
     
@@ -131,7 +324,7 @@ async def record_time_out(
     else:
         check_time = get_current_indian_time().time()
     
-    shift = get_shift_by_time(check_time, db)
+    shift = await get_shift_by_time(check_time, db)
     
     if not shift:
         raise HTTPException(
@@ -140,11 +333,11 @@ async def record_time_out(
         )
     
     # Find attendance record
-    attendance = db.query(models.Attendance).filter(
+    attendance = await db.scalar(select(models.Attendance).where(
         models.Attendance.user_id == current_user.id,
         models.Attendance.attendance_date == current_date,
         models.Attendance.shift_id == shift.id
-    ).first()
+    ))
     
     if not attendance:
         raise HTTPException(
@@ -165,9 +358,9 @@ async def record_time_out(
         )
     
     # Update time_out
-    attendance.time_out = attendance_data.time_out or get_current_indian_time()
-    db.commit()
-    db.refresh(attendance)
+    attendance.time_out = attendance_data.time_out or get_current_indian_time().replace(tzinfo=None)
+    await db.commit()
+    await db.refresh(attendance)
     
     return {
         "message": "Time-out recorded successfully",
@@ -176,88 +369,66 @@ async def record_time_out(
 
 @router.get("/attendance/today", response_model=List[schemas.Attendance])
 async def get_today_attendance(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     current_date = get_current_indian_time().date()
     
-    attendances = db.query(models.Attendance).filter(
+    attendances = (await db.scalars(select(models.Attendance).where(
         models.Attendance.user_id == current_user.id,
         models.Attendance.attendance_date == current_date
-    ).all()
+    ))).all()
     
     return attendances
 
 # In your attendance.py, update the shift endpoints:
-@router.get("/attendance/shifts", response_model=List[schemas.ShiftResponse])
-async def get_active_shifts(db: Session = Depends(get_db)):
-    shifts = db.query(models.Shift).filter(models.Shift.is_active == True).all()
-    
-    # Convert time objects to strings for response
-    shift_responses = []
-    for shift in shifts:
-        shift_responses.append({
-            "id": shift.id,
-            "name": shift.name,
-            "start_time": shift.start_time.strftime("%H:%M:%S") if shift.start_time else None,
-            "end_time": shift.end_time.strftime("%H:%M:%S") if shift.end_time else None,
-            "is_active": shift.is_active,
-            "description": shift.description
-        })
-    
-    return shift_responses
+@router.get("/attendance/shifts", response_model=List[schemas.ShiftResponse], dependencies=[Depends(conditional_get("shift"))])
+async def get_active_shifts(db: AsyncSession = Depends(get_async_db)):
+    return (await shift_schedule.ensure_loaded_async(db)).payloads()
 
 @router.get("/attendance/current-shift", response_model=schemas.ShiftResponse)
-async def get_current_shift_endpoint(db: Session = Depends(get_db)):
-    shift = get_current_shift(db)
+async def get_current_shift_endpoint(db: AsyncSession = Depends(get_async_db)):
+    shift = await get_current_shift(db)
     if not shift:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No active shift at the moment"
         )
     
-    # Convert time objects to strings for response
-    shift_response = {
-        "id": shift.id,
-        "name": shift.name,
-        "start_time": shift.start_time.strftime("%H:%M:%S") if shift.start_time else None,
-        "end_time": shift.end_time.strftime("%H:%M:%S") if shift.end_time else None,
-        "is_active": shift.is_active,
-        "description": shift.description
-    }
-    
-    return shift_response
+    return shift_schedule.payload(shift.id)
 
 @router.get("/attendance/history", response_model=List[schemas.Attendance])
 async def get_attendance_history(
     start_date: Optional[datetime.date] = None,
     end_date: Optional[datetime.date] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    query = db.query(models.Attendance).filter(
+    query = select(*ATTENDANCE_COLUMNS).where(
         models.Attendance.user_id == current_user.id
     )
     
     if start_date:
-        query = query.filter(models.Attendance.attendance_date >= start_date)
+        query = query.where(models.Attendance.attendance_date >= start_date)
     if end_date:
-        query = query.filter(models.Attendance.attendance_date <= end_date)
+        query = query.where(models.Attendance.attendance_date <= end_date)
     
-    return query.order_by(models.Attendance.attendance_date.desc()).all()
+    query = page.apply(query, ATTENDANCE_PAGE_KEYS, descending=True)
+    return rows_response((await db.execute(query)).all(), page)
 
 @router.put("/attendance/{attendance_id}", response_model=schemas.Attendance)
 async def update_attendance(
     attendance_id: int,
     attendance_data: schemas.AttendanceUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     # Find attendance record
-    attendance = db.query(models.Attendance).filter(
+    attendance = await db.scalar(select(models.Attendance).where(
         models.Attendance.id == attendance_id,
         models.Attendance.user_id == current_user.id
-    ).first()
+    ))
     
     if not attendance:
         raise HTTPException(
@@ -269,51 +440,164 @@ async def update_attendance(
     if attendance_data.time_out:
         attendance.time_out = attendance_data.time_out
     
-    db.commit()
-    db.refresh(attendance)
+    await db.commit()
+    await db.refresh(attendance)
     
     return attendance
 
-@router.get("/attendance/stats/monthly", response_model=dict)
-async def get_monthly_stats(
-    year: int = None,
-    month: int = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
-):
-    # Use current year/month if not provided
+def month_bounds(year: int = None, month: int = None):
+    """Resolve year/month (default: current Indian month) to its first and last day"""
     now = get_current_indian_time()
     year = year or now.year
     month = month or now.month
     
-    # Calculate start and end dates for the month
     start_date = datetime.date(year, month, 1)
     if month == 12:
         end_date = datetime.date(year + 1, 1, 1) - datetime.timedelta(days=1)
     else:
         end_date = datetime.date(year, month + 1, 1) - datetime.timedelta(days=1)
+    return year, month, start_date, end_date
+
+def attendance_rate(present_days: int, total_days: int):
+    return round((present_days / total_days) * 100, 2) if total_days > 0 else 0
+
+# A day counts once however many shifts were attended on it
+PRESENT_DAYS = func.count(distinct(models.Attendance.attendance_date))
+
+@router.get("/attendance/stats/monthly", response_model=dict)
+async def get_monthly_stats(
+    year: int = None,
+    month: int = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    year, month, start_date, end_date = month_bounds(year, month)
     
-    # Get attendance records for the month
-    attendances = db.query(models.Attendance).filter(
+    present_days = await db.scalar(select(PRESENT_DAYS).where(
         models.Attendance.user_id == current_user.id,
         models.Attendance.attendance_date >= start_date,
-        models.Attendance.attendance_date <= end_date
-    ).all()
+        models.Attendance.attendance_date <= end_date,
+        models.Attendance.status == 'P'
+    ))
     
-    # Calculate stats
     total_days = (end_date - start_date).days + 1
-    present_days = sum(1 for a in attendances if a.status == 'P')
-    absent_days = total_days - present_days
     
     return {
         "year": year,
         "month": month,
         "total_days": total_days,
         "present_days": present_days,
-        "absent_days": absent_days,
-        "attendance_rate": round((present_days / total_days) * 100, 2) if total_days > 0 else 0
+        "absent_days": total_days - present_days,
+        "attendance_rate": attendance_rate(present_days, total_days)
     }
 
+@router.get("/attendance/stats/monthly/gym/{gym_id}", response_model=dict)
+async def get_gym_monthly_stats(
+    gym_id: int,
+    year: int = None,
+    month: int = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Monthly stats for every member of a gym, in one grouped query"""
+    if not current_user.is_owner and not current_user.is_trainer:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only owners and trainers can access gym attendance stats"
+        )
+    
+    year, month, start_date, end_date = month_bounds(year, month)
+    
+    # Outer join with the month's present rows so members with none still get a 0
+    rows = (await db.execute(
+        select(
+            models.User.id,
+            models.User.member_id,
+            models.User.full_name,
+            PRESENT_DAYS.label("present_days")
+        ).outerjoin(
+            models.Attendance,
+            and_(
+                models.Attendance.user_id == models.User.id,
+                models.Attendance.attendance_date >= start_date,
+                models.Attendance.attendance_date <= end_date,
+                models.Attendance.status == 'P'
+            )
+        ).where(
+            models.User.gym_id == gym_id
+        ).group_by(
+            models.User.id
+        ).order_by(
+            models.User.id
+        )
+    )).all()
+    
+    total_days = (end_date - start_date).days + 1
+    
+    return {
+        "year": year,
+        "month": month,
+        "gym_id": gym_id,
+        "total_days": total_days,
+        "members": [
+            {
+                "user_id": row.id,
+                "member_id": row.member_id,
+                "full_name": row.full_name,
+                "present_days": row.present_days,
+                "absent_days": total_days - row.present_days,
+                "attendance_rate": attendance_rate(row.present_days, total_days)
+            }
+            for row in rows
+        ]
+    }
+
+@router.get("/attendance/rollup/daily", response_model=List[schemas.AttendanceRollup])
+async def get_daily_rollup(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    gym_id: int = None,
+    shift_id: int = None,
+    by_shift: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Present/absent/defaulted-timeout counts per day (and shift) for a gym.
+    
+    Read from daily_attendance_rollup, so the cost follows the number of
+    days in the range rather than the number of attendance rows.
+    """
+    if not current_user.is_owner and not current_user.is_trainer:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only owners and trainers can access attendance data"
+        )
+    
+    Rollup = models.DailyAttendanceRollup
+    gym_id = gym_id or current_user.gym_id
+    
+    if by_shift:
+        query = select(Rollup)
+    else:
+        query = select(
+            Rollup.gym_id,
+            Rollup.attendance_date,
+            func.sum(Rollup.present).label("present"),
+            func.sum(Rollup.absent).label("absent"),
+            func.sum(Rollup.defaulted_timeouts).label("defaulted_timeouts")
+        ).group_by(Rollup.gym_id, Rollup.attendance_date)
+    
+    query = query.where(
+        Rollup.gym_id == gym_id,
+        Rollup.attendance_date >= start_date,
+        Rollup.attendance_date <= end_date
+    )
+    if shift_id:
+        query = query.where(Rollup.shift_id == shift_id)
+    
+    if by_shift:
+        return (await db.scalars(query.order_by(Rollup.attendance_date, Rollup.shift_id))).all()
+    return (await db.execute(query.order_by(Rollup.attendance_date))).all()
 
 #--------------------------
 # Admin endpoints for attendance management
@@ -321,8 +605,8 @@ async def get_monthly_stats(
 @router.post("/attendance/admin", response_model=schemas.Attendance)
 async def create_attendance_admin(
     attendance_data: schemas.AttendanceCreateAdmin,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     print(f"Current user: {current_user.email}, is_owner: {current_user.is_owner}, is_trainer: {current_user.is_trainer}")
     print(f"Attendance data: {attendance_data}")
@@ -332,42 +616,128 @@ async def create_attendance_admin(
             detail="Only owners and trainers can create attendance records"
         )
     
-    # Check if attendance already exists
-    existing_attendance = db.query(models.Attendance).filter(
-        models.Attendance.user_id == attendance_data.user_id,
-        models.Attendance.attendance_date == attendance_data.attendance_date,
-        models.Attendance.shift_id == attendance_data.shift_id
-    ).first()
-    
-    if existing_attendance:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Attendance record already exists for this user, date, and shift"
-        )
-    
-    # Create new attendance record
-    attendance = models.Attendance(
+    # Insert unless a record already exists for this user, date and shift
+    attendance_table = models.Attendance.__table__
+    now = datetime.datetime.utcnow()
+    stmt = dialect_insert(db)(attendance_table).values(
         user_id=attendance_data.user_id,
         shift_id=attendance_data.shift_id,
         attendance_date=attendance_data.attendance_date,
         time_in=attendance_data.time_in,
         time_out=attendance_data.time_out,
-        status=attendance_data.status
-    )
+        status=attendance_data.status,
+        timeout_default=False,
+        created_at=now,
+        updated_at=now
+    ).on_conflict_do_nothing(index_elements=ATTENDANCE_KEY).returning(*attendance_table.c)
+    
+    attendance = (await db.execute(stmt)).first()
+    if attendance is None:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Attendance record already exists for this user, date, and shift"
+        )
     
-    db.add(attendance)
-    db.commit()
-    db.refresh(attendance)
+    rollup = rollup_delta(
+        db, attendance.attendance_date, attendance.shift_id, user_id=attendance.user_id,
+        **status_delta(None, attendance.status)
+    )
+    if rollup is not None:
+        await db.execute(rollup)
+    await db.commit()
     
     return attendance
 
+@router.post("/attendance/admin/import", response_model=schemas.AttendanceImportResult)
+async def import_attendance_admin(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Bulk-create attendance records, e.g. to rebuild a day after a kiosk outage.
+    
+    The body is a JSON list of AttendanceCreateAdmin records (or
+    {"records": [...]}), or CSV with Content-Type: text/csv and a header row
+    of the same field names. Invalid rows and rows whose (user, date, shift)
+    already exists are reported back by row number; the rest are inserted
+    with executemany, one transaction per IMPORT_CHUNK_SIZE rows. The
+    insert returns the keys it actually wrote, so the count and the rollup
+    deltas cover exactly those rows on every driver.
+    """
+    if not current_user.is_owner and not current_user.is_trainer:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only owners and trainers can create attendance records"
+        )
+    
+    try:
+        raw_rows = parse_import_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if len(raw_rows) > settings.IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.IMPORT_MAX_ROWS} records per import"
+        )
+    
+    records, gym_by_user, errors = await validate_import_rows(db, raw_rows)
+    
+    attendance_table = models.Attendance.__table__
+    now = datetime.datetime.utcnow()
+    inserted = 0
+    
+    for start in range(0, len(records), settings.IMPORT_CHUNK_SIZE):
+        chunk = records[start:start + settings.IMPORT_CHUNK_SIZE]
+        # The unique key still guards against rows written since validation;
+        # rows that lose that race are simply not returned
+        result = await db.execute(
+            dialect_insert(db)(attendance_table).on_conflict_do_nothing(index_elements=ATTENDANCE_KEY).returning(
+                attendance_table.c.user_id, attendance_table.c.attendance_date, attendance_table.c.shift_id
+            ),
+            [
+                {
+                    "user_id": record.user_id,
+                    "shift_id": record.shift_id,
+                    "attendance_date": record.attendance_date,
+                    "time_in": record.time_in,
+                    "time_out": record.time_out,
+                    "status": record.status,
+                    "timeout_default": False,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for record in chunk
+            ]
+        )
+        
+        written = set(result.all())
+        
+        deltas = {}
+        for record in chunk:
+            if (record.user_id, record.attendance_date, record.shift_id) not in written:
+                continue
+            group = (gym_by_user[record.user_id] or NO_GYM, record.attendance_date, record.shift_id)
+            delta = deltas.setdefault(group, {"present": 0, "absent": 0})
+            for counter, change in status_delta(None, record.status).items():
+                delta[counter] += change
+        for (gym_id, attendance_date, shift_id), delta in deltas.items():
+            await db.execute(rollup_delta(db, attendance_date, shift_id, gym_id=gym_id, **delta))
+        
+        await db.commit()
+        inserted += len(written)
+    
+    return {"received": len(raw_rows), "inserted": inserted, "errors": errors}
+
 @router.get("/attendance/admin", response_model=List[schemas.Attendance])
 async def get_attendance_admin(
     date: date = None,
     user_id: int = None,
     shift_id: int = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get attendance records with optional filtering"""
     # Check if user has permission
@@ -378,27 +748,54 @@ async def get_attendance_admin(
         )
     
     # Build query
-    query = db.query(models.Attendance)
+    query = select(*ATTENDANCE_COLUMNS)
     
     # Apply filters
     if date:
-        query = query.filter(models.Attendance.attendance_date == date)
+        query = query.where(models.Attendance.attendance_date == date)
     if user_id:
-        query = query.filter(models.Attendance.user_id == user_id)
+        query = query.where(models.Attendance.user_id == user_id)
     if shift_id:
-        query = query.filter(models.Attendance.shift_id == shift_id)
+        query = query.where(models.Attendance.shift_id == shift_id)
     
-    # Execute query
-    attendances = query.order_by(models.Attendance.attendance_date.desc()).all()
+    # Execute query, newest first, one page at a time
+    query = page.apply(query, ATTENDANCE_PAGE_KEYS, descending=True)
+    rows = (await db.execute(query)).all()
     
-    return attendances
+    return rows_response(rows, page)
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+@router.get("/attendance/admin/export")
+async def export_attendance_admin(
+    format: Literal["csv", "ndjson"] = "csv",
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    gym_id: int = None,
+    user_id: int = None,
+    shift_id: int = None,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream attendance rows as CSV or NDJSON for payroll and billing"""
+    if not current_user.is_owner and not current_user.is_trainer:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only owners and trainers can export attendance data"
+        )
+    
+    query = export_query(start_date, end_date, gym_id, user_id, shift_id)
+    return StreamingResponse(
+        stream_attendance_export(query, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="attendance.{format}"'}
+    )
 
 @router.put("/attendance/admin/{attendance_id}", response_model=schemas.Attendance)
 async def update_attendance_admin(
     attendance_id: int,
     attendance_data: schemas.AttendanceUpdateAdmin,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     if not current_user.is_owner and not current_user.is_trainer:
         raise HTTPException(
@@ -406,7 +803,7 @@ async def update_attendance_admin(
             detail="Only owners and trainers can update attendance records"
         )
     
-    attendance = db.query(models.Attendance).filter(models.Attendance.id == attendance_id).first()
+    attendance = await db.scalar(select(models.Attendance).where(models.Attendance.id == attendance_id))
     if not attendance:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -418,19 +815,25 @@ async def update_attendance_admin(
         attendance.time_in = attendance_data.time_in
     if attendance_data.time_out is not None:
         attendance.time_out = attendance_data.time_out
-    if attendance_data.status is not None:
+    if attendance_data.status is not None and attendance_data.status != attendance.status:
+        rollup = rollup_delta(
+            db, attendance.attendance_date, attendance.shift_id, user_id=attendance.user_id,
+            **status_delta(attendance.status, attendance_data.status)
+        )
         attendance.status = attendance_data.status
+        if rollup is not None:
+            await db.execute(rollup)
     
-    db.commit()
-    db.refresh(attendance)
+    await db.commit()
+    await db.refresh(attendance)
     
     return attendance
 
 @router.get("/attendance/admin/{attendance_id}", response_model=schemas.Attendance)
 async def get_attendance_by_id(
     attendance_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     if not current_user.is_owner and not current_user.is_trainer:
         raise HTTPException(
@@ -438,7 +841,7 @@ async def get_attendance_by_id(
             detail="Only owners and trainers can access attendance data"
         )
     
-    attendance = db.query(models.Attendance).filter(models.Attendance.id == attendance_id).first()
+    attendance = await db.scalar(select(models.Attendance).where(models.Attendance.id == attendance_id))
     if not attendance:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,17 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.db import models, schemas
-from app.core.security import get_password_hash, verify_password, create_access_token
-from app.utils.otp import generate_otp, send_email_otp, store_otp, verify_otp  # Import the correct function
+from app.core.security import get_password_hash_async, verify_password_async, create_access_token
+from app.utils.otp import generate_otp, send_email_otp, store_otp_async, verify_otp_async  # Import the correct function
 
 router = APIRouter()
 
 @router.post("/register", response_model=schemas.User)
-async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user already exists
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+    db_user = await db.scalar(select(models.User).where(models.User.email == user.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -19,7 +20,7 @@ async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db))
         )
     
     # Check if gym exists
-    db_gym = db.query(models.Gym).filter(models.Gym.id == user.gym_id).first()
+    db_gym = await db.get(models.Gym, user.gym_id)
     if not db_gym:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -27,7 +28,7 @@ async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db))
         )
     
     # Create user (not verified yet)
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = models.User(
         email=user.email,
         password=hashed_password,
@@ -43,12 +44,12 @@ async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db))
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     # Generate and store OTP
     otp = generate_otp()
-    store_otp(user.email, otp)
+    await store_otp_async(user.email, otp)
 
     # Send OTP email
     send_email_otp(user.email, otp)
@@ -56,8 +57,8 @@ async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db))
     return db_user
 
 @router.post("/verify-otp")
-async def verify_otp_endpoint(verification: schemas.UserVerify, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == verification.email).first()
+async def verify_otp_endpoint(verification: schemas.UserVerify, db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.scalar(select(models.User).where(models.User.email == verification.email))
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -71,10 +72,10 @@ async def verify_otp_endpoint(verification: schemas.UserVerify, db: Session = De
         )
     
     # CORRECTED: Call verify_otp function with parameters
-    if not verify_otp(verification.email, verification.otp):  # Pass email and OTP
+    if not await verify_otp_async(verification.email, verification.otp):  # Pass email and OTP
         # Generate and store OTP
         otp = generate_otp()
-        store_otp(db_user.email, otp)
+        await store_otp_async(db_user.email, otp)
 
         # Send OTP email
         send_email_otp(db_user.email, otp)
@@ -87,13 +88,13 @@ async def verify_otp_endpoint(verification: schemas.UserVerify, db: Session = De
 
     # Mark user as verified
     db_user.is_verified = True
-    db.commit()
+    await db.commit()
     
     return {"message": "Email verified successfully"}
 
 @router.post("/resend-otp")
-async def resend_otp(request: schemas.UserResendOtp, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == request.email).first()
+async def resend_otp(request: schemas.UserResendOtp, db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.scalar(select(models.User).where(models.User.email == request.email))
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -108,7 +109,7 @@ async def resend_otp(request: schemas.UserResendOtp, db: Session = Depends(get_d
     
     # Generate and store new OTP
     otp = generate_otp()
-    store_otp(request.email, otp)
+    await store_otp_async(request.email, otp)
     
     # Send OTP email
     send_email_otp(request.email, otp)
@@ -116,9 +117,9 @@ async def resend_otp(request: schemas.UserResendOtp, db: Session = Depends(get_d
     return {"message": "OTP sent successfully"}
 
 @router.post("/login")
-async def login(user_login: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user_login.email).first()
-    if not db_user or not verify_password(user_login.password, db_user.password):
+async def login(user_login: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.scalar(select(models.User).where(models.User.email == user_login.email))
+    if not db_user or not await verify_password_async(user_login.password, db_user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -128,7 +129,7 @@ async def login(user_login: schemas.UserLogin, db: Session = Depends(get_db)):
     if not db_user.is_verified:
         # Generate and send new OTP for unverified users
         otp = generate_otp()
-        store_otp(db_user.email, otp)
+        await store_otp_async(db_user.email, otp)
         send_email_otp(db_user.email, otp)
         
         raise HTTPException(
@@ -2,6 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db import models, schemas
+from app.utils.pagination import Page
+from app.utils.table_versions import conditional_get
 
 router = APIRouter()
 
@@ -26,10 +28,10 @@ def create_gym(gym: schemas.GymCreate, db: Session = Depends(get_db)):
     db.refresh(db_gym)
     return db_gym
 
-@router.get("/gyms/", response_model=list[schemas.Gym])
-def read_gyms(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    gyms = db.query(models.Gym).offset(skip).limit(limit).all()
-    return gyms
+@router.get("/gyms/", response_model=list[schemas.Gym], dependencies=[Depends(conditional_get("gym"))])
+def read_gyms(page: Page = Depends(), db: Session = Depends(get_db)):
+    gyms = page.apply(db.query(models.Gym), [models.Gym.id]).all()
+    return page.finish(gyms)
 
 @router.get("/gyms/{gym_id}", response_model=schemas.Gym)
 def read_gym(gym_id: int, db: Session = Depends(get_db)):
@@ -1,7 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+import io
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.security import Principal, get_current_user
 from app.db.database import get_db
 from app.db import models, schemas
+from app.utils.pagination import Page
+from app.utils.pincode_index import pincode_index
+from app.utils.pincode_loader import load_pincode_csv
+from app.utils.table_versions import conditional_get
 
 router = APIRouter()
 
@@ -30,10 +40,10 @@ def create_state_country(state_country: schemas.StateCountryCreate, db: Session
     db.refresh(db_state_country)
     return db_state_country
 
-@router.get("/state_country/", response_model=list[schemas.StateCountry])
-def read_state_countries(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    state_countries = db.query(models.StateCountry).offset(skip).limit(limit).all()
-    return state_countries
+@router.get("/state_country/", response_model=list[schemas.StateCountry], dependencies=[Depends(conditional_get("state_country"))])
+def read_state_countries(page: Page = Depends(), db: Session = Depends(get_db)):
+    state_countries = page.apply(db.query(models.StateCountry), [models.StateCountry.id]).all()
+    return page.finish(state_countries)
 
 @router.get("/state_country/{state_country_id}", response_model=schemas.StateCountry)
 def read_state_country(state_country_id: int, db: Session = Depends(get_db)):
@@ -53,11 +63,16 @@ def delete_state_country(state_country_id: int, db: Session = Depends(get_db)):
     return {"message": "State-Country deleted successfully"}
 
 # Pincode endpoints
+async def _fresh_pincode_index():
+    # Reloading queries the database, so keep it off the event loop
+    if pincode_index.is_stale:
+        await run_in_threadpool(pincode_index.load)
+    return pincode_index
+
 @router.post("/pincode/", response_model=schemas.Pincode)
 def create_pincode(pincode: schemas.PincodeCreate, db: Session = Depends(get_db)):
-    # Check if pincode already exists
-    db_pincode = db.query(models.Pincode).filter(models.Pincode.pincode == pincode.pincode).first()
-    if db_pincode:
+    # Check if pincode already exists (the unique constraint still guards races)
+    if pincode_index.ensure_loaded().get(pincode.pincode):
         raise HTTPException(
             status_code=400,
             detail="Pincode already exists"
@@ -75,18 +90,69 @@ def create_pincode(pincode: schemas.PincodeCreate, db: Session = Depends(get_db)
     
     db_pincode = models.Pincode(
         pincode=pincode.pincode,
-        state_country_id=pincode.state_country_id
+        state_country_id=pincode.state_country_id,
+        district=pincode.district
     )
     
     db.add(db_pincode)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request (or worker) created it after the index was loaded
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Pincode already exists"
+        )
     db.refresh(db_pincode)
     return db_pincode
 
-@router.get("/pincode/", response_model=list[schemas.Pincode])
-def read_pincodes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    pincodes = db.query(models.Pincode).offset(skip).limit(limit).all()
-    return pincodes
+@router.post("/pincode/bulk", response_model=schemas.PincodeBulkResult)
+async def bulk_load_pincodes(request: Request, current_user: Principal = Depends(get_current_user)):
+    """Load a postal-directory CSV (text/csv request body) into pincode and state_country.
+
+    The body is spooled to a temporary file as it arrives and then loaded in
+    batched transactions; existing pincodes are updated in place.
+    """
+    if not current_user.is_owner:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only owners can bulk load pincodes"
+        )
+    
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        try:
+            return await run_in_threadpool(load_pincode_csv, stream)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            stream.detach()
+
+@router.get("/pincode/search", response_model=list[schemas.PincodeLookup])
+async def search_pincodes(
+    prefix: str = Query(..., min_length=1, max_length=6, pattern=r"^\d+$"),
+    limit: int = Query(settings.PINCODE_SEARCH_LIMIT, ge=1, le=100)
+):
+    """Prefix autocomplete over the in-memory pincode index"""
+    index = await _fresh_pincode_index()
+    return [entry._asdict() for entry in index.search(prefix, limit)]
+
+@router.get("/pincode/lookup/{pincode}", response_model=schemas.PincodeLookup)
+async def lookup_pincode(pincode: str):
+    """Resolve a pincode to its district, state and country without touching the database"""
+    entry = (await _fresh_pincode_index()).get(pincode)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Pincode not found")
+    return entry._asdict()
+
+@router.get("/pincode/", response_model=list[schemas.Pincode], dependencies=[Depends(conditional_get("pincode"))])
+def read_pincodes(page: Page = Depends(), db: Session = Depends(get_db)):
+    pincodes = page.apply(db.query(models.Pincode), [models.Pincode.id]).all()
+    return page.finish(pincodes)
 
 @router.get("/pincode/{pincode_id}", response_model=schemas.Pincode)
 def read_pincode(pincode_id: int, db: Session = Depends(get_db)):
@@ -96,11 +162,11 @@ def read_pincode(pincode_id: int, db: Session = Depends(get_db)):
     return db_pincode
 
 @router.get("/pincode/by_code/{pincode}", response_model=schemas.Pincode)
-def read_pincode_by_code(pincode: str, db: Session = Depends(get_db)):
-    db_pincode = db.query(models.Pincode).filter(models.Pincode.pincode == pincode).first()
-    if db_pincode is None:
+async def read_pincode_by_code(pincode: str):
+    entry = (await _fresh_pincode_index()).get(pincode)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Pincode not found")
-    return db_pincode
+    return entry._asdict()
 
 @router.delete("/pincode/{pincode_id}")
 def delete_pincode(pincode_id: int, db: Session = Depends(get_db)):
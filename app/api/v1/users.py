@@ -1,14 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db import models, schemas
+from app.utils.pagination import Page
+from app.utils.fast_json import rows_response, schema_columns
 
 router = APIRouter()
 
+# List endpoints select the schema's columns and skip per-row validation
+USER_COLUMNS = schema_columns(models.User, schemas.User)
+
 @router.get("/users/", response_model=list[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(models.User).offset(skip).limit(limit).all()
-    return users
+def read_users(page: Page = Depends(), db: Session = Depends(get_db)):
+    rows = db.execute(page.apply(select(*USER_COLUMNS), [models.User.id])).all()
+    return rows_response(rows, page)
 
 @router.get("/users/{user_id}", response_model=schemas.User)
 def read_user(user_id: int, db: Session = Depends(get_db)):
@@ -18,9 +24,10 @@ def read_user(user_id: int, db: Session = Depends(get_db)):
     return db_user
 
 @router.get("/gyms/{gym_id}/users", response_model=list[schemas.User])
-def read_gym_users(gym_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(models.User).filter(models.User.gym_id == gym_id).offset(skip).limit(limit).all()
-    return users
+def read_gym_users(gym_id: int, page: Page = Depends(), db: Session = Depends(get_db)):
+    query = select(*USER_COLUMNS).where(models.User.gym_id == gym_id)
+    rows = db.execute(page.apply(query, [models.User.id])).all()
+    return rows_response(rows, page)
 
 # from fastapi import APIRouter, Depends, HTTPException
 # from sqlalchemy.orm import Session
@@ -3,24 +3,131 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def async_database_url(url: str) -> str:
+    """Swap the driver of a sync database URL for its asyncio counterpart"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql:") or url.startswith("postgres:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    if url.startswith("postgresql+psycopg2:"):
+        return "postgresql+asyncpg:" + url[len("postgresql+psycopg2:"):]
+    return url
+
 class Settings:
     PROJECT_NAME: str = "Gym Management System"
     PROJECT_VERSION: str = "1.0.0"
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./gym.db")
+    # Used by the async routers; derived from DATABASE_URL (aiosqlite/asyncpg) unless set
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+    
+    # Connection pool (server databases such as PostgreSQL)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    
+    # SQLite connection pragmas
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", -20000))  # negative = KiB
+    SQLITE_FOREIGN_KEYS: bool = os.getenv("SQLITE_FOREIGN_KEYS", "false").lower() == "true"
     
     # JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Decoded-token cache used by get_current_user
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+    
+    # Password hashing (bcrypt runs in a worker pool, off the event loop)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 5))
+    
+    # List endpoints (keyset pagination)
+    PAGE_SIZE_DEFAULT: int = int(os.getenv("PAGE_SIZE_DEFAULT", 100))
+    PAGE_SIZE_MAX: int = int(os.getenv("PAGE_SIZE_MAX", 1000))
+    
+    # Rows fetched per round trip by the streaming attendance export
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+    
+    # Bulk attendance import
+    IMPORT_MAX_ROWS: int = int(os.getenv("IMPORT_MAX_ROWS", 50000))
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+    
+    # Largest member list accepted by one kiosk check-in call
+    KIOSK_BATCH_MAX: int = int(os.getenv("KIOSK_BATCH_MAX", 500))
+    
+    # Open attendance rows get time_out = time_in + this many minutes once it has passed
+    DEFAULT_TIMEOUT_MINUTES: int = int(os.getenv("DEFAULT_TIMEOUT_MINUTES", 60))
+    
+    # Attendance maintenance scheduler (cron syntax: minute hour day month weekday)
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    SCHEDULER_TIMEZONE: str = os.getenv("SCHEDULER_TIMEZONE", "Asia/Kolkata")
+    MARK_ABSENT_SCHEDULE: str = os.getenv("MARK_ABSENT_SCHEDULE", "55 23 * * *")
+    DEFAULT_TIMEOUT_SCHEDULE: str = os.getenv("DEFAULT_TIMEOUT_SCHEDULE", "* * * * *")
+    # A worker that dies mid-job holds its lease at most this long
+    SCHEDULER_LEASE_SECONDS: int = int(os.getenv("SCHEDULER_LEASE_SECONDS", 600))
+    
+    # Pincode index (in-memory, reloaded after this many seconds) and bulk CSV loading
+    PINCODE_INDEX_TTL_SECONDS: int = int(os.getenv("PINCODE_INDEX_TTL_SECONDS", 3600))
+    PINCODE_SEARCH_LIMIT: int = int(os.getenv("PINCODE_SEARCH_LIMIT", 20))
+    PINCODE_BATCH_SIZE: int = int(os.getenv("PINCODE_BATCH_SIZE", 2000))
+    PINCODE_DEFAULT_COUNTRY: str = os.getenv("PINCODE_DEFAULT_COUNTRY", "India")
+    
+    # Per-request SQL instrumentation: X-DB-Queries/Server-Timing headers and
+    # a warning when one statement runs this many times in a request (N+1)
+    QUERY_INSTRUMENTATION: bool = os.getenv("QUERY_INSTRUMENTATION", "false").lower() == "true"
+    QUERY_REPEAT_WARN_THRESHOLD: int = int(os.getenv("QUERY_REPEAT_WARN_THRESHOLD", 10))
+    
+    # Reference data ETags: per-table change counters are re-read after this
+    # many seconds (other workers' writes); browsers may reuse a response for
+    # REFERENCE_CACHE_MAX_AGE seconds before revalidating (0: always revalidate)
+    TABLE_VERSION_TTL_SECONDS: int = int(os.getenv("TABLE_VERSION_TTL_SECONDS", 30))
+    REFERENCE_CACHE_MAX_AGE: int = int(os.getenv("REFERENCE_CACHE_MAX_AGE", 0))
+    
+    # Response compression of JSON/HTML bodies of at least COMPRESSION_MIN_SIZE
+    # bytes: brotli when installed and accepted, else gzip
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", 6))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", 4))
+    
+    # Static assets: source directory and its fingerprinted, precompressed build
+    STATIC_DIR: str = os.getenv("STATIC_DIR", "static")
+    STATIC_BUILD_DIR: str = os.getenv("STATIC_BUILD_DIR", "static_build")
+    
+    # Shift schedule cache (reloaded after this many seconds)
+    SHIFT_CACHE_TTL_SECONDS: int = int(os.getenv("SHIFT_CACHE_TTL_SECONDS", 300))
+    
+    # OTP store: "memory" (single worker only), "sql" or "redis"
+    OTP_STORE_BACKEND: str = os.getenv("OTP_STORE_BACKEND", "memory")
+    OTP_REDIS_URL: str = os.getenv("OTP_REDIS_URL", "redis://localhost:6379/0")
+    OTP_EVICTION_INTERVAL: int = int(os.getenv("OTP_EVICTION_INTERVAL", 60))
+    
     # SMTP/Email settings
     SMTP_SERVER: str = os.getenv("SMTP_SERVER", "smtp.gmail.com")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", 587))
     SMTP_USERNAME: str = os.getenv("SMTP_USERNAME", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     FROM_EMAIL: str = os.getenv("FROM_EMAIL", "")
+    # Set to false for a local stand-in server without TLS
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+    
+    # Email dispatcher (background queue with persistent SMTP connections)
+    EMAIL_WORKERS: int = int(os.getenv("EMAIL_WORKERS", 2))
+    EMAIL_BATCH_SIZE: int = int(os.getenv("EMAIL_BATCH_SIZE", 20))
+    EMAIL_QUEUE_MAX: int = int(os.getenv("EMAIL_QUEUE_MAX", 1000))
+    EMAIL_MAX_RETRIES: int = int(os.getenv("EMAIL_MAX_RETRIES", 3))
+    EMAIL_RETRY_BACKOFF: float = float(os.getenv("EMAIL_RETRY_BACKOFF", 1))
+    EMAIL_IDLE_TIMEOUT: float = float(os.getenv("EMAIL_IDLE_TIMEOUT", 60))
+    EMAIL_SMTP_TIMEOUT: float = float(os.getenv("EMAIL_SMTP_TIMEOUT", 10))
+    EMAIL_SHUTDOWN_TIMEOUT: float = float(os.getenv("EMAIL_SHUTDOWN_TIMEOUT", 10))
     #print(SMTP_SERVER,SMTP_PORT,SMTP_USERNAME,SMTP_PASSWORD,FROM_EMAIL)
 settings = Settings()
 
@@ -1,13 +1,19 @@
 # app/core/security.py
+import asyncio
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy import event, inspect, select
+from app.db.database import AsyncSessionLocal
 from app.db import models
 from app.core.config import settings
+from app.utils.metrics import password_hash_seconds
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
@@ -18,6 +24,70 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# bcrypt releases the GIL, so a thread pool keeps the ~250 ms hashes off the
+# event loop. A per-loop semaphore caps concurrent hashes; callers that can't
+# get a slot within PASSWORD_HASH_QUEUE_TIMEOUT get a 503 instead of queueing
+# forever behind a login burst.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_slots = None
+_hash_slots_loop = None
+
+password_hash_stats = {
+    "waiting": 0,      # queued for a slot
+    "running": 0,      # hashing right now
+    "completed": 0,
+    "rejected": 0,     # gave up after PASSWORD_HASH_QUEUE_TIMEOUT
+    "total_seconds": 0.0,
+    "max_seconds": 0.0,
+}
+
+def _get_hash_slots():
+    global _hash_slots, _hash_slots_loop
+    loop = asyncio.get_running_loop()
+    if _hash_slots is None or _hash_slots_loop is not loop:
+        _hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+        _hash_slots_loop = loop
+    return _hash_slots
+
+async def _run_password_job(func, operation: str, *args):
+    slots = _get_hash_slots()
+    
+    password_hash_stats["waiting"] += 1
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        password_hash_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"},
+        )
+    finally:
+        password_hash_stats["waiting"] -= 1
+    
+    password_hash_stats["running"] += 1
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        elapsed = time.perf_counter() - started
+        password_hash_stats["running"] -= 1
+        password_hash_stats["completed"] += 1
+        password_hash_stats["total_seconds"] += elapsed
+        password_hash_stats["max_seconds"] = max(password_hash_stats["max_seconds"], elapsed)
+        password_hash_seconds.observe(elapsed, operation)
+        slots.release()
+
+async def verify_password_async(plain_password, hashed_password):
+    """verify_password() on the hashing pool, for async handlers"""
+    return await _run_password_job(verify_password, "verify", plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    """get_password_hash() on the hashing pool, for async handlers"""
+    return await _run_password_job(get_password_hash, "hash", password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -28,34 +98,119 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-# Add this to your security.py if you want a quick mock
-def get_current_user(db: Session = Depends(get_db)):
-    # For development only - get the first user
-    user = db.query(models.User).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No users found in database"
-        )
-    return user
-# def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-#     credentials_exception = HTTPException(
-#         status_code=status.HTTP_401_UNAUTHORIZED,
-#         detail="Could not validate credentials",
-#         headers={"WWW-Authenticate": "Bearer"},
-#     )
-#     try:
-#         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-#         email: str = payload.get("sub")
-#         if email is None:
-#             raise credentials_exception
-#     except JWTError:
-#         raise credentials_exception
+# Lightweight, detached identity of the authenticated user
+Principal = namedtuple("Principal", ["id", "gym_id", "email", "is_member", "is_trainer", "is_owner", "is_active"])
+
+class TokenCache:
+    """Bounded LRU of bearer token -> (Principal, expiry).
+
+    A hit skips both the JWT signature check and the user lookup. Entries
+    end at the token's own exp or after PRINCIPAL_CACHE_TTL_SECONDS,
+    whichever comes first, so role changes made through another worker are
+    picked up within the TTL. Changes made in this process invalidate the
+    user's tokens immediately (see _invalidate_user_tokens below).
+    """
+
+    def __init__(self, maxsize: int = settings.PRINCIPAL_CACHE_SIZE,
+                 ttl_seconds: int = settings.PRINCIPAL_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(token)
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(token)
+            self.stats["hits"] += 1
+            return principal
+
+    def put(self, token: str, principal: Principal, token_expires_at: float):
+        expires_at = min(token_expires_at, time.time() + self.ttl_seconds)
+        with self._lock:
+            self._entries[token] = (principal, expires_at)
+            self._entries.move_to_end(token)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _remove(self, token: str):
+        principal, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+
+    def invalidate_user(self, user_id: int):
+        """Forget every cached token of one user"""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+token_cache = TokenCache()
+
+def principal_from_user(user):
+    return Principal(user.id, user.gym_id, user.email, user.is_member, user.is_trainer, user.is_owner, user.is_active)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    """Resolve the bearer token to a Principal, from the cache when possible"""
+    principal = token_cache.get(token)
+    if principal is not None:
+        return principal
     
-#     user = db.query(models.User).filter(models.User.email == email).first()
-#     if user is None:
-#         raise credentials_exception
-#     return user
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        email: str = payload.get("sub")
+        if email is None:
+            raise credentials_exception
+    except JWTError:
+        raise credentials_exception
+    
+    # Only on a miss: open a session just for the lookup
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(models.User).where(models.User.email == email))
+    if user is None or not user.is_active:
+        raise credentials_exception
+    
+    principal = principal_from_user(user)
+    token_cache.put(token, principal, payload["exp"])
+    return principal
+
+# Role and activation changes must not be served from the cache
+PRINCIPAL_FIELDS = ("is_member", "is_trainer", "is_owner", "is_active", "gym_id", "email")
+
+def _invalidate_user_tokens(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in PRINCIPAL_FIELDS):
+        token_cache.invalidate_user(target.id)
+
+def _forget_user_tokens(mapper, connection, target):
+    token_cache.invalidate_user(target.id)
+
+event.listen(models.User, "after_update", _invalidate_user_tokens)
+event.listen(models.User, "after_delete", _forget_user_tokens)
 
 # from passlib.context import CryptContext
 # from fastapi import Depends, HTTPException
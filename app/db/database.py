@@ -1,18 +1,95 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.ASYNC_DATABASE_URL
 
+def sqlite_pragmas():
+    """PRAGMAs applied to every new SQLite connection, from Settings"""
+    return {
+        # WAL lets readers run alongside the single writer instead of blocking it
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        # Wait for the write lock instead of failing with "database is locked"
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        # NORMAL is durable across application crashes in WAL mode and skips an fsync per commit
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "foreign_keys": "ON" if settings.SQLITE_FOREIGN_KEYS else "OFF",
+    }
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def engine_options(url: str):
+    """create_engine() keyword arguments tuned for the URL's dialect"""
+    if url.startswith("sqlite"):
+        # File databases get a QueuePool by default; one writer at a time is
+        # all SQLite allows, so a large pool only adds lock waiters
+        return {
+            "connect_args": {"check_same_thread": False},
+        }
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, **overrides):
+    """Build the sync engine with per-dialect pool settings and SQLite pragmas"""
+    db_engine = create_engine(url, **{**engine_options(url), **overrides})
+    if db_engine.dialect.name == "sqlite":
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+    return db_engine
+
+def create_async_db_engine(url: str = ASYNC_SQLALCHEMY_DATABASE_URL, **overrides):
+    """Same as create_db_engine() for the asyncio drivers (aiosqlite/asyncpg)"""
+    options = engine_options(url)
+    options.pop("connect_args", None)
+    db_engine = create_async_engine(url, **{**options, **overrides})
+    if db_engine.dialect.name == "sqlite":
+        event.listen(db_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return db_engine
+
+def pool_stats(db_engine):
+    """Connection pool counters for health checks and benchmarks"""
+    pool = db_engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    for counter in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, counter):
+            stats[counter] = getattr(pool, counter)()
+    return stats
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the async route handlers, so queries don't block the event loop
+async_engine = create_async_db_engine()
+# expire_on_commit=False: attributes can't be lazily reloaded after commit under asyncio
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
+def dialect_insert(db):
+    """Return the insert() construct for the session's dialect so callers can
+    use ON CONFLICT (supported by both SQLite and PostgreSQL)"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -21,3 +98,8 @@ def get_db():
     finally:
         db.close()
 
+# Async dependency to get DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
@@ -1,5 +1,6 @@
 # app/db/init_data.py
-from app.db.database import SessionLocal
+from sqlalchemy import inspect, text
+from app.db.database import SessionLocal, engine
 from app.db import models
 import datetime
 import logging
@@ -49,6 +50,66 @@ def init_shifts():
     finally:
         db.close()
 
+def ensure_indexes():
+    """Create indexes declared on the models that are missing from existing tables.
+
+    create_all() only creates indexes together with new tables, so databases
+    created before an index was added to a model need this on startup.
+    """
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    created = 0
+    
+    for table in models.Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            try:
+                index.create(bind=engine)
+                created += 1
+                logger.info(f"Created index {index.name} on {table.name}")
+            except Exception as e:
+                # Typically a unique index over rows that already contain duplicates
+                logger.error(f"Error creating index {index.name} on {table.name}: {e}")
+    
+    return created
+
+def ensure_columns():
+    """Add nullable columns declared on the models that are missing from existing tables.
+
+    Like ensure_indexes(), for databases created before the column existed.
+    Only nullable columns without server defaults are added; anything else
+    needs a real migration.
+    """
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    added = 0
+    
+    for table in models.Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns or not column.nullable or column.primary_key:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added += 1
+                logger.info(f"Added column {column.name} to {table.name}")
+            except Exception as e:
+                logger.error(f"Error adding column {column.name} to {table.name}: {e}")
+    
+    return added
+
 # You can keep this for manual execution
 if __name__ == "__main__":
+    ensure_columns()
+    ensure_indexes()
     init_shifts()
\ No newline at end of file
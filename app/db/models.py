@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Date, Time
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Date, Time, Float, Index, text
 from app.db.database import Base
 from sqlalchemy.orm import relationship
 import datetime  # Import the whole datetime module
@@ -19,6 +19,7 @@ class Pincode(Base):
     id = Column(Integer, primary_key=True, index=True)
     pincode = Column(String(6), unique=True, nullable=False)
     state_country_id = Column(Integer, ForeignKey("state_country.id"))
+    district = Column(String, nullable=True)
     state_country = relationship("StateCountry", back_populates="pincodes")
     gyms = relationship("Gym", back_populates="pincode_ref")
     users = relationship("User", back_populates="pincode_ref")
@@ -63,6 +64,14 @@ class User(Base):
     pincode_id = Column(Integer, ForeignKey("pincode.id"))
     pincode_ref = relationship("Pincode", back_populates="users")
 
+class OtpCode(Base):
+    __tablename__ = "otp_code"
+    
+    # Pending email verification codes for the "sql" OTP store backend
+    email = Column(String, primary_key=True)
+    otp = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
 # NEW ATTENDANCE MODELS
 class Shift(Base):
     __tablename__ = "shift"
@@ -79,18 +88,71 @@ class Shift(Base):
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    __table_args__ = (
+        # One row per user, day and shift; also the lookup key for time-in/out
+        Index("uq_attendance_user_date_shift", "user_id", "attendance_date", "shift_id", unique=True),
+        # Only checked-in rows still waiting for a time-out; keeps the default-timeout sweep small
+        Index(
+            "ix_attendance_open_time_in", "time_in",
+            sqlite_where=text("time_out IS NULL AND time_in IS NOT NULL"),
+            postgresql_where=text("time_out IS NULL AND time_in IS NOT NULL")
+        ),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("user.id"))
     shift_id = Column(Integer, ForeignKey("shift.id"))
-    attendance_date = Column(Date, default=datetime.date.today)
+    attendance_date = Column(Date, default=datetime.date.today, index=True)
     time_in = Column(DateTime, nullable=True)
     time_out = Column(DateTime, nullable=True)
     status = Column(String(1), default='A')  # P=Present, A=Absent
     timeout_default = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)
     
     # Relationships
     user = relationship("User", backref="attendances")
-    shift = relationship("Shift", back_populates="attendances")
\ No newline at end of file
+    shift = relationship("Shift", back_populates="attendances")
+
+class DailyAttendanceRollup(Base):
+    __tablename__ = "daily_attendance_rollup"
+    
+    # Per gym, day and shift counters kept in step with attendance writes
+    # (see app/utils/attendance_rollup.py); not foreign keys so a backfill
+    # never depends on row order
+    gym_id = Column(Integer, primary_key=True)
+    attendance_date = Column(Date, primary_key=True)
+    shift_id = Column(Integer, primary_key=True)
+    present = Column(Integer, nullable=False, default=0)
+    absent = Column(Integer, nullable=False, default=0)
+    defaulted_timeouts = Column(Integer, nullable=False, default=0)
+
+class JobLease(Base):
+    __tablename__ = "job_lease"
+    
+    # One row per scheduled job; the worker that claims a fire time runs it
+    # (see app/utils/scheduler.py)
+    job_name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    fire_at = Column(DateTime, nullable=False)      # UTC, the scheduled run being held
+    expires_at = Column(DateTime, nullable=False)   # UTC, lease lapses if the owner dies
+
+class JobRun(Base):
+    __tablename__ = "job_run"
+    
+    id = Column(Integer, primary_key=True)
+    job_name = Column(String, nullable=False, index=True)
+    owner = Column(String, nullable=False)
+    fire_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    rows_affected = Column(Integer)
+    error = Column(String)  # None when the job succeeded
+
+class TableVersion(Base):
+    __tablename__ = "table_version"
+    
+    # Change counter per reference table, bumped in the writing transaction;
+    # list endpoints derive their ETags from it (see app/utils/table_versions.py)
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
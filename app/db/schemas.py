@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, ConfigDict
 from datetime import datetime, date, time
-from typing import Optional
+from typing import List, Optional
 
 # State and Country schemas
 class StateCountryBase(BaseModel):
@@ -19,6 +19,7 @@ class StateCountry(StateCountryBase):
 class PincodeBase(BaseModel):
     pincode: str
     state_country_id: int
+    district: Optional[str] = None
 
 class PincodeCreate(PincodeBase):
     pass
@@ -28,6 +29,21 @@ class Pincode(PincodeBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class PincodeLookup(BaseModel):
+    """A pincode resolved to its place, served from the in-memory index"""
+    pincode: str
+    district: Optional[str] = None
+    state_name: Optional[str] = None
+    country_name: Optional[str] = None
+    state_country_id: Optional[int] = None
+
+class PincodeBulkResult(BaseModel):
+    rows_read: int
+    pincodes_written: int
+    states_created: int
+    skipped: int
+    elapsed_seconds: float
+
 # Gym schemas
 class GymBase(BaseModel):
     gym_name: str
@@ -142,6 +158,25 @@ class AttendanceResponse(BaseModel):
     attendance: Optional[Attendance] = None
     already_recorded: bool = False
 
+class KioskCheckIn(BaseModel):
+    # Members by user id and/or by card (member_id); shift defaults to the current one
+    user_ids: List[int] = []
+    member_ids: List[int] = []
+    shift_id: Optional[int] = None
+    attendance_date: Optional[date] = None
+
+class KioskCheckInResult(BaseModel):
+    user_id: Optional[int] = None
+    member_id: Optional[int] = None
+    result: str  # recorded, already_recorded, not_found, inactive
+    attendance_id: Optional[int] = None
+
+class KioskCheckInResponse(BaseModel):
+    shift_id: int
+    attendance_date: date
+    recorded: int
+    results: List[KioskCheckInResult]
+
 class AttendanceCreateAdmin(BaseModel):
     user_id: int
     shift_id: int
@@ -155,6 +190,25 @@ class AttendanceUpdateAdmin(BaseModel):
     time_out: Optional[datetime] = None
     status: Optional[str] = None
 
+class AttendanceImportError(BaseModel):
+    row: int
+    error: str
+
+class AttendanceImportResult(BaseModel):
+    received: int
+    inserted: int
+    errors: List[AttendanceImportError]
+
+class AttendanceRollup(BaseModel):
+    gym_id: int
+    attendance_date: date
+    shift_id: Optional[int] = None  # None when summed across shifts
+    present: int
+    absent: int
+    defaulted_timeouts: int
+    
+    model_config = ConfigDict(from_attributes=True)
+
 # from pydantic import BaseModel, EmailStr
 # from typing import Optional
 # from datetime import datetime
@@ -0,0 +1,311 @@
+# app/db/synthetic_data.py
+"""Deterministic synthetic data for performance work on attendance queries.
+
+Creates N gyms (each with its own state and pincode), M users per gym
+(one owner, a few trainers, the rest members, some inactive or
+unverified) and attendance for every day in a date range:
+
+- each member has a personal check-in propensity (beta distributed around
+  --checkin-probability, lower at weekends), a preferred shift
+  (--morning-share) and a usual arrival time scattered around that shift's
+  peak, and only attends from their join date;
+- a visit is a 'P' row with time_in/time_out; --forgot-checkout of them
+  were closed by the default-timeout sweep instead (timeout_default);
+- like the nightly mark_absent_users job, active verified members get an
+  'A' row for every other active shift of the day (--no-absent-rows to skip).
+
+Rows are written with bulk executemany inserts in --batch-size chunks and
+the daily rollup is rebuilt at the end, so 10M attendance rows load in a
+few minutes on SQLite. The same --seed and arguments (with --end-date
+pinned) always produce the same data. Writes to the configured DATABASE_URL:
+
+    python -m app.db.synthetic_data --gyms 10 --members-per-gym 700 --years 2 --seed 1
+"""
+import argparse
+import datetime
+import random
+import time
+from sqlalchemy import func, insert, select
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db import models
+from app.db.database import Base, SessionLocal, engine
+from app.db.init_data import init_shifts
+from app.utils.attendance_rollup import rebuild_rollup
+
+STATES = [
+    ("Karnataka", "56"), ("Maharashtra", "41"), ("Tamil Nadu", "60"), ("Kerala", "68"),
+    ("Delhi", "11"), ("Telangana", "50"), ("West Bengal", "70"), ("Gujarat", "38"),
+    ("Uttar Pradesh", "22"), ("Rajasthan", "30"),
+]
+CITIES = ["Central", "North", "South", "East", "West", "Lake View", "Hill Road", "Market", "Station", "Garden"]
+
+# Weekday (Monday = 0) multipliers on the check-in propensity
+WEEKDAY_FACTOR = (1.0, 1.0, 0.95, 0.95, 0.9, 0.75, 0.45)
+
+# Minutes after the shift start at which arrivals peak, and their spread
+ARRIVAL_PEAK_MINUTES = {"Morning": 180, "Evening": 330}
+ARRIVAL_SPREAD_MINUTES = 60
+
+ATTENDANCE_COLUMNS = (
+    "user_id", "shift_id", "attendance_date", "time_in", "time_out",
+    "status", "timeout_default", "created_at", "updated_at",
+)
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+def _minutes(t: datetime.time):
+    return t.hour * 60 + t.minute
+
+class Generator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.now = datetime.datetime(2000, 1, 1) if args.fixed_timestamps else datetime.datetime.utcnow()
+        self.stats = {"gyms": 0, "users": 0, "attendance": 0}
+
+    def _attendance_writer(self, connection):
+        """Return write(rows) inserting attendance tuples in ATTENDANCE_COLUMNS order.
+
+        Bypasses SQLAlchemy's per-value bind processing, which costs more
+        than the inserts themselves at this volume. SQLite gets dates and
+        datetimes pre-formatted exactly as its DateTime type stores them.
+        """
+        compiled = insert(models.Attendance.__table__).compile(
+            dialect=connection.dialect, column_keys=list(ATTENDANCE_COLUMNS)
+        )
+        sql = str(compiled)
+        positional = compiled.positiontup is not None
+        if positional:
+            assert tuple(compiled.positiontup) == ATTENDANCE_COLUMNS
+
+        def write(rows):
+            if not rows:
+                return
+            params = rows if positional else [dict(zip(ATTENDANCE_COLUMNS, row)) for row in rows]
+            connection.exec_driver_sql(sql, params)
+            self.stats["attendance"] += len(rows)
+            rows.clear()
+
+        if connection.dialect.name == "sqlite":
+            self._date = datetime.date.isoformat
+            self._stamp = lambda value: value.isoformat(" ", "microseconds")
+        else:
+            self._date = self._stamp = lambda value: value
+        return write
+
+    def create_places_and_gyms(self, db):
+        """One state (reused by name), pincode and gym per requested gym"""
+        states = {name: state_id for state_id, name in db.execute(
+            select(models.StateCountry.id, models.StateCountry.state_name).where(
+                models.StateCountry.country_name == "India"
+            )
+        )}
+        taken_codes = set(db.scalars(select(models.Pincode.pincode)))
+        gym_serial = (db.scalar(select(func.count()).select_from(models.Gym)) or 0) + 1
+
+        gyms = []
+        for index in range(self.args.gyms):
+            state_name, prefix = STATES[index % len(STATES)]
+            if state_name not in states:
+                state = models.StateCountry(state_name=state_name, country_name="India")
+                db.add(state)
+                db.flush()
+                states[state_name] = state.id
+
+            code = f"{prefix}{self.rng.randrange(10000):04d}"
+            while code in taken_codes:
+                code = f"{prefix}{self.rng.randrange(10000):04d}"
+            taken_codes.add(code)
+            district = f"{state_name} {self.rng.choice(CITIES)}"
+            pincode = models.Pincode(pincode=code, state_country_id=states[state_name], district=district)
+            db.add(pincode)
+            db.flush()
+
+            gym = models.Gym(
+                gym_name=f"{self.rng.choice(CITIES)} Fitness {gym_serial + index}",
+                gymID=f"SYN{self.args.seed:04d}{gym_serial + index:05d}",
+                address=f"{self.rng.randrange(1, 400)} {self.rng.choice(CITIES)} Road",
+                district=district, state_ut=state_name, pincode=code, country="India",
+                pincode_id=pincode.id, created_at=self.now
+            )
+            db.add(gym)
+            db.flush()
+            gyms.append(gym)
+        db.commit()
+        self.stats["gyms"] = len(gyms)
+        return gyms
+
+    def create_users(self, db, gyms, password_hash):
+        """Users for every gym; returns per gym a list of (user_id, profile) for members"""
+        first_member_id = next_member_id = (db.scalar(select(func.max(models.User.member_id))) or 0) + 1
+        rows = []
+        for gym in gyms:
+            trainers = max(1, round(self.args.members_per_gym * self.args.trainer_share))
+            for position in range(self.args.members_per_gym):
+                member_id = next_member_id
+                next_member_id += 1
+                is_owner = position == 0
+                is_trainer = 0 < position <= trainers
+                rows.append({
+                    "gym_id": gym.id,
+                    "email": f"user{member_id}.s{self.args.seed}@synthetic.example.com",
+                    "password": password_hash,
+                    "full_name": f"Member {member_id}",
+                    "member_id": member_id,
+                    "address": f"{self.rng.randrange(1, 900)} {self.rng.choice(CITIES)} Street",
+                    "district": gym.district,
+                    "state_ut": gym.state_ut,
+                    "pincode": gym.pincode,
+                    "pincode_id": gym.pincode_id,
+                    "phone": f"9{self.rng.randrange(10 ** 9):09d}",
+                    "created_at": self.now,
+                    "is_member": not is_owner and not is_trainer,
+                    "is_trainer": is_trainer,
+                    "is_owner": is_owner,
+                    "is_active": is_owner or self.rng.random() >= self.args.inactive_share,
+                    "is_verified": is_owner or self.rng.random() >= self.args.unverified_share,
+                })
+        with engine.begin() as connection:
+            for start in range(0, len(rows), self.args.batch_size):
+                connection.execute(insert(models.User), rows[start:start + self.args.batch_size])
+        self.stats["users"] = len(rows)
+
+        ids = dict(db.execute(
+            select(models.User.member_id, models.User.id).where(models.User.member_id >= first_member_id)
+        ).all())
+        return [{**row, "id": ids[row["member_id"]]} for row in rows]
+
+    def member_profile(self, user, shifts, start_date, days):
+        args = self.args
+        k = 6.0
+        propensity = self.rng.betavariate(args.checkin_probability * k, (1 - args.checkin_probability) * k)
+        shift = shifts[0] if self.rng.random() < args.morning_share or len(shifts) == 1 else shifts[1]
+        peak = ARRIVAL_PEAK_MINUTES.get(shift.name, (_minutes(shift.end_time) - _minutes(shift.start_time)) // 2)
+        usual_arrival = _minutes(shift.start_time) + peak + self.rng.gauss(0, ARRIVAL_SPREAD_MINUTES)
+        # A fifth of members predate the range, the rest join during it
+        join_offset = 0 if self.rng.random() < 0.2 else self.rng.randrange(days)
+        return {
+            "propensity": propensity,
+            "shift": shift,
+            "usual_arrival": usual_arrival,
+            "stay": _clamp(self.rng.gauss(75, 20), 25, 180),
+            "joined": start_date + datetime.timedelta(days=join_offset),
+        }
+
+    def write_attendance(self, users, shifts, start_date, end_date):
+        args = self.args
+        rng = self.rng
+        days = (end_date - start_date).days + 1
+        batch = []
+        started = time.perf_counter()
+
+        with engine.begin() as connection:
+            write = self._attendance_writer(connection)
+            date, stamp = self._date, self._stamp
+            absent_stamp = stamp(self.now)
+            for user in users:
+                if user["is_owner"]:
+                    continue
+                profile = self.member_profile(user, shifts, start_date, days)
+                shift = profile["shift"]
+                earliest, latest = _minutes(shift.start_time), _minutes(shift.end_time)
+                writes_absent = args.absent_rows and user["is_active"] and user["is_verified"]
+                user_id = user["id"]
+                day = profile["joined"]
+
+                while day <= end_date:
+                    attended = rng.random() < profile["propensity"] * WEEKDAY_FACTOR[day.weekday()]
+                    day_value = date(day)
+                    for other in shifts:
+                        if attended and other is shift:
+                            arrival = _clamp(round(profile["usual_arrival"] + rng.gauss(0, 20)), earliest, latest - 1)
+                            time_in = datetime.datetime.combine(day, datetime.time(arrival // 60, arrival % 60, rng.randrange(60)))
+                            forgot = rng.random() < args.forgot_checkout
+                            stay = settings.DEFAULT_TIMEOUT_MINUTES if forgot else _clamp(rng.gauss(profile["stay"], 15), 15, 240)
+                            time_in_value = stamp(time_in)
+                            batch.append((
+                                user_id, shift.id, day_value, time_in_value,
+                                stamp(time_in + datetime.timedelta(minutes=stay)),
+                                "P", forgot, time_in_value, time_in_value,
+                            ))
+                        elif writes_absent:
+                            batch.append((
+                                user_id, other.id, day_value, None, None,
+                                "A", False, absent_stamp, absent_stamp,
+                            ))
+                    if len(batch) >= args.batch_size:
+                        write(batch)
+                    day += datetime.timedelta(days=1)
+
+                if args.progress and self.stats["attendance"] and user_id % 500 == 0:
+                    elapsed = time.perf_counter() - started
+                    print(f"  {self.stats['attendance']:,} attendance rows, {self.stats['attendance'] / elapsed:,.0f}/s")
+            write(batch)
+
+    def run(self):
+        args = self.args
+        end_date = args.end_date or datetime.date.today() - datetime.timedelta(days=1)
+        start_date = end_date - datetime.timedelta(days=args.days - 1)
+
+        Base.metadata.create_all(bind=engine)
+        init_shifts()
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            shifts = db.scalars(
+                select(models.Shift).where(models.Shift.is_active == True).order_by(models.Shift.start_time)
+            ).all()
+            db.expunge_all()
+            gyms = self.create_places_and_gyms(db)
+            # One bcrypt hash shared by everyone; hashing per user would dominate the run
+            users = self.create_users(db, gyms, get_password_hash(args.password))
+        finally:
+            db.close()
+
+        self.write_attendance(users, shifts, start_date, end_date)
+
+        db = SessionLocal()
+        try:
+            rollup_rows = rebuild_rollup(db, start_date, end_date)
+            db.commit()
+        finally:
+            db.close()
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"Generated {self.stats['gyms']} gyms, {self.stats['users']:,} users and "
+            f"{self.stats['attendance']:,} attendance rows ({start_date} to {end_date}) "
+            f"in {elapsed:.1f}s; {rollup_rows:,} rollup rows"
+        )
+        return self.stats
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic gyms, members and attendance")
+    parser.add_argument("--gyms", type=int, default=10)
+    parser.add_argument("--members-per-gym", type=int, default=500, help="users per gym, owner and trainers included")
+    span = parser.add_mutually_exclusive_group()
+    span.add_argument("--days", type=int, default=365)
+    span.add_argument("--years", type=float)
+    parser.add_argument("--end-date", type=datetime.date.fromisoformat, help="last attendance day (default: yesterday)")
+    parser.add_argument("--checkin-probability", type=float, default=0.55, help="mean weekday check-in chance")
+    parser.add_argument("--morning-share", type=float, default=0.6, help="members who prefer the first shift")
+    parser.add_argument("--forgot-checkout", type=float, default=0.05, help="visits closed by the default timeout")
+    parser.add_argument("--trainer-share", type=float, default=0.02)
+    parser.add_argument("--inactive-share", type=float, default=0.05)
+    parser.add_argument("--unverified-share", type=float, default=0.03)
+    parser.add_argument("--no-absent-rows", dest="absent_rows", action="store_false")
+    parser.add_argument("--password", default="synthetic-password", help="password of every generated user")
+    parser.add_argument("--batch-size", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fixed-timestamps", action="store_true",
+                        help="use a fixed created_at so repeated runs give identical rows (bar the bcrypt salt)")
+    parser.add_argument("--progress", action="store_true")
+    args = parser.parse_args(argv)
+    if args.years:
+        args.days = round(args.years * 365)
+    return args
+
+if __name__ == "__main__":
+    Generator(parse_args()).run()
@@ -0,0 +1,88 @@
+# app/utils/attendance_export.py
+import csv
+import datetime
+import io
+import json
+from sqlalchemy import select
+from app.core.config import settings
+from app.db import models
+from app.db.database import AsyncSessionLocal
+
+# Flat export row: one attendance record joined with its member and shift
+EXPORT_COLUMNS = [
+    models.Attendance.id.label("attendance_id"),
+    models.Attendance.attendance_date,
+    models.User.gym_id,
+    models.Attendance.user_id,
+    models.User.member_id,
+    models.User.full_name,
+    models.Attendance.shift_id,
+    models.Shift.name.label("shift_name"),
+    models.Attendance.time_in,
+    models.Attendance.time_out,
+    models.Attendance.status,
+    models.Attendance.timeout_default,
+]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+def export_query(start_date=None, end_date=None, gym_id=None, user_id=None, shift_id=None):
+    """Core (non-ORM) select of the export rows, ordered for stable output"""
+    query = select(*EXPORT_COLUMNS).select_from(models.Attendance).join(
+        models.User, models.User.id == models.Attendance.user_id
+    ).outerjoin(
+        models.Shift, models.Shift.id == models.Attendance.shift_id
+    )
+
+    if start_date:
+        query = query.where(models.Attendance.attendance_date >= start_date)
+    if end_date:
+        query = query.where(models.Attendance.attendance_date <= end_date)
+    if gym_id:
+        query = query.where(models.User.gym_id == gym_id)
+    if user_id:
+        query = query.where(models.Attendance.user_id == user_id)
+    if shift_id:
+        query = query.where(models.Attendance.shift_id == shift_id)
+
+    return query.order_by(models.Attendance.attendance_date, models.Attendance.id)
+
+def _json_value(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+def _csv_chunk(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+def _ndjson_chunk(rows):
+    return "".join(
+        json.dumps({field: _json_value(value) for field, value in zip(EXPORT_FIELDS, row)}) + "\n"
+        for row in rows
+    )
+
+async def stream_attendance_export(query, format: str = "csv", batch_size: int = settings.EXPORT_BATCH_SIZE):
+    """Yield the export as text chunks of at most batch_size rows.
+
+    Rows come off a server-side cursor (stream_results with yield_per), so
+    only one batch is ever held in memory, however long the export is. The
+    session is opened here rather than taken from a dependency because it
+    has to outlive the handler while the response body is being sent.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+
+        if format == "csv":
+            first = True
+            async for rows in result.partitions():
+                yield _csv_chunk(rows, header=first)
+                first = False
+            if first:
+                yield _csv_chunk([], header=True)
+        else:
+            async for rows in result.partitions():
+                yield _ndjson_chunk(rows)
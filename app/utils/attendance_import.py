@@ -0,0 +1,105 @@
+# app/utils/attendance_import.py
+import csv
+import io
+import json
+from pydantic import ValidationError
+from sqlalchemy import select
+from app.db import models, schemas
+
+IMPORT_STATUSES = ('P', 'A')
+# Ids per IN (...) query; stays under SQLite's bound-variable limit (999 on older builds)
+ID_CHUNK_SIZE = 900
+
+def parse_import_body(body: bytes, content_type: str):
+    """Turn a JSON or CSV request body into a list of raw row dicts.
+
+    JSON may be a list of records or {"records": [...]}. CSV needs a header
+    row with the AttendanceCreateAdmin field names; empty cells are None.
+    Raises ValueError with a message for the client on malformed input.
+    """
+    text = body.decode("utf-8-sig")
+    if content_type.startswith("text/csv"):
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames:
+            raise ValueError("CSV body has no header row")
+        return [{key: (value if value != "" else None) for key, value in row.items()} for row in reader]
+
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    if isinstance(payload, dict):
+        payload = payload.get("records")
+    if not isinstance(payload, list):
+        raise ValueError('Expected a JSON list of records or {"records": [...]}')
+    return payload
+
+def _row_error(row_number: int, message: str):
+    return {"row": row_number, "error": message}
+
+async def validate_import_rows(db, raw_rows):
+    """Validate every row in one pass; returns (valid records, gym by user id, errors).
+
+    Field validation runs per row in Python. Users, shifts and existing
+    (user, date, shift) keys are checked with set-based queries over the
+    whole batch, ID_CHUNK_SIZE user ids at a time. Row numbers in errors
+    are 1-based positions in the input.
+    """
+    errors = []
+    parsed = []
+    for row_number, raw in enumerate(raw_rows, start=1):
+        try:
+            record = schemas.AttendanceCreateAdmin.model_validate(raw)
+        except ValidationError as e:
+            details = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            errors.append(_row_error(row_number, details))
+            continue
+        if record.status not in IMPORT_STATUSES:
+            errors.append(_row_error(row_number, f"status must be one of {', '.join(IMPORT_STATUSES)}"))
+            continue
+        parsed.append((row_number, record))
+
+    if not parsed:
+        return [], {}, errors
+
+    user_ids = sorted({record.user_id for _, record in parsed})
+    dates = [record.attendance_date for _, record in parsed]
+
+    gym_by_user = {}
+    existing = set()
+    shift_ids = set((await db.scalars(select(models.Shift.id))).all())
+    for start in range(0, len(user_ids), ID_CHUNK_SIZE):
+        chunk = user_ids[start:start + ID_CHUNK_SIZE]
+        gym_by_user.update((await db.execute(
+            select(models.User.id, models.User.gym_id).where(models.User.id.in_(chunk))
+        )).all())
+        existing.update((await db.execute(
+            select(
+                models.Attendance.user_id,
+                models.Attendance.attendance_date,
+                models.Attendance.shift_id
+            ).where(
+                models.Attendance.user_id.in_(chunk),
+                models.Attendance.attendance_date >= min(dates),
+                models.Attendance.attendance_date <= max(dates)
+            )
+        )).all())
+
+    seen = set()
+    valid = []
+    for row_number, record in parsed:
+        key = (record.user_id, record.attendance_date, record.shift_id)
+        if record.user_id not in gym_by_user:
+            errors.append(_row_error(row_number, f"User {record.user_id} not found"))
+        elif record.shift_id not in shift_ids:
+            errors.append(_row_error(row_number, f"Shift {record.shift_id} not found"))
+        elif key in existing:
+            errors.append(_row_error(row_number, "Attendance record already exists for this user, date, and shift"))
+        elif key in seen:
+            errors.append(_row_error(row_number, "Duplicate of an earlier row in this import"))
+        else:
+            seen.add(key)
+            valid.append(record)
+
+    errors.sort(key=lambda error: error["row"])
+    return valid, gym_by_user, errors
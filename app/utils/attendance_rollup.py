@@ -0,0 +1,152 @@
+# app/utils/attendance_rollup.py
+"""Maintenance of the daily_attendance_rollup table.
+
+Every attendance write that changes a row's status or timeout_default also
+applies the matching +/- delta to its (gym, date, shift) rollup row, in the
+same transaction, through rollup_delta(). The nightly jobs, which touch a
+whole day at once, call rebuild_rollup() for that day instead. Running this
+module rebuilds the table from scratch:
+
+    python -m app.utils.attendance_rollup [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD]
+"""
+import argparse
+import datetime
+import time
+from sqlalchemy import case, delete, func, insert, select
+from app.db import models
+from app.db.database import SessionLocal, dialect_insert
+
+Rollup = models.DailyAttendanceRollup
+
+# Users without a gym are rolled up under gym 0
+NO_GYM = 0
+# and attendance without a shift under shift 0, since both are key columns
+NO_SHIFT = 0
+
+def status_delta(old_status, new_status):
+    """Rollup counter changes for a row moving from old_status to new_status.
+
+    old_status is None for a newly inserted row.
+    """
+    delta = {"present": 0, "absent": 0}
+    for status_value, sign in ((old_status, -1), (new_status, 1)):
+        if status_value == 'P':
+            delta["present"] += sign
+        elif status_value == 'A':
+            delta["absent"] += sign
+    return delta
+
+def rollup_delta(db, attendance_date: datetime.date, shift_id: int, gym_id: int = None,
+                 user_id: int = None, present: int = 0, absent: int = 0, defaulted_timeouts: int = 0):
+    """Build the upsert that adds a delta to one rollup row, or None if there is nothing to add.
+
+    Pass gym_id when it is already known (the caller's own principal);
+    otherwise user_id, and the gym is looked up inside the statement. Works
+    with both Session and AsyncSession, the caller executes it.
+    """
+    if not (present or absent or defaulted_timeouts):
+        return None
+    if shift_id is None:
+        shift_id = NO_SHIFT
+
+    if gym_id is None and user_id is not None:
+        gym_id = func.coalesce(
+            select(models.User.gym_id).where(models.User.id == user_id).scalar_subquery(),
+            NO_GYM
+        )
+    elif gym_id is None:
+        gym_id = NO_GYM
+
+    stmt = dialect_insert(db)(Rollup).values(
+        gym_id=gym_id,
+        attendance_date=attendance_date,
+        shift_id=shift_id,
+        present=present,
+        absent=absent,
+        defaulted_timeouts=defaulted_timeouts
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["gym_id", "attendance_date", "shift_id"],
+        set_={
+            "present": Rollup.present + stmt.excluded.present,
+            "absent": Rollup.absent + stmt.excluded.absent,
+            "defaulted_timeouts": Rollup.defaulted_timeouts + stmt.excluded.defaulted_timeouts,
+        }
+    )
+
+def rebuild_rollup(db, start_date: datetime.date = None, end_date: datetime.date = None):
+    """Recompute rollup rows for a date range (all dates if omitted) from attendance.
+
+    Runs in the caller's transaction; returns the number of rollup rows written.
+    """
+    stale = delete(Rollup)
+    totals = select(
+        func.coalesce(models.User.gym_id, NO_GYM),
+        models.Attendance.attendance_date,
+        func.coalesce(models.Attendance.shift_id, NO_SHIFT),
+        func.sum(case((models.Attendance.status == 'P', 1), else_=0)),
+        func.sum(case((models.Attendance.status == 'A', 1), else_=0)),
+        func.sum(case((models.Attendance.timeout_default == True, 1), else_=0))
+    ).select_from(models.Attendance).join(
+        models.User, models.User.id == models.Attendance.user_id
+    )
+
+    if start_date:
+        stale = stale.where(Rollup.attendance_date >= start_date)
+        totals = totals.where(models.Attendance.attendance_date >= start_date)
+    if end_date:
+        stale = stale.where(Rollup.attendance_date <= end_date)
+        totals = totals.where(models.Attendance.attendance_date <= end_date)
+
+    totals = totals.group_by(
+        func.coalesce(models.User.gym_id, NO_GYM),
+        models.Attendance.attendance_date,
+        func.coalesce(models.Attendance.shift_id, NO_SHIFT)
+    )
+
+    db.execute(stale)
+    result = db.execute(
+        insert(Rollup).from_select(
+            ["gym_id", "attendance_date", "shift_id", "present", "absent", "defaulted_timeouts"],
+            totals
+        )
+    )
+    return result.rowcount
+
+def backfill(start_date: datetime.date = None, end_date: datetime.date = None):
+    """Rebuild the rollup in its own transaction and report how long it took"""
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        rows_written = rebuild_rollup(db, start_date, end_date)
+        db.commit()
+        elapsed = time.perf_counter() - started
+        print(f"Rebuilt daily_attendance_rollup: {rows_written} rows in {elapsed:.2f}s")
+        return rows_written
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def ensure_rollup():
+    """Backfill once when the rollup table is new but attendance already has rows"""
+    db = SessionLocal()
+    try:
+        needs_backfill = (
+            db.scalar(select(Rollup.gym_id).limit(1)) is None
+            and db.scalar(select(models.Attendance.id).limit(1)) is not None
+        )
+    finally:
+        db.close()
+    return backfill() if needs_backfill else 0
+
+if __name__ == "__main__":
+    from app.db.database import Base, engine
+    Base.metadata.create_all(bind=engine)
+
+    parser = argparse.ArgumentParser(description="Rebuild daily_attendance_rollup from attendance")
+    parser.add_argument("--start-date", type=datetime.date.fromisoformat)
+    parser.add_argument("--end-date", type=datetime.date.fromisoformat)
+    args = parser.parse_args()
+    backfill(args.start_date, args.end_date)
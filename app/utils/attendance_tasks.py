@@ -1,7 +1,12 @@
 # app/utils/attendance_tasks.py
 from app.db.database import SessionLocal
 from app.db import models
+from app.utils.attendance_rollup import NO_GYM, rebuild_rollup, rollup_delta
+from app.core.config import settings
+from sqlalchemy import Boolean, Date, DateTime, and_, func, insert, literal, select, true, update
+from collections import Counter
 import datetime
+import time
 import pytz
 
 INDIAN_TIMEZONE = pytz.timezone('Asia/Kolkata')
@@ -9,75 +14,131 @@ INDIAN_TIMEZONE = pytz.timezone('Asia/Kolkata')
 def get_current_indian_time():
     return datetime.datetime.now(INDIAN_TIMEZONE)
 
-def mark_absent_users():
-    """Mark users as absent who didn't record attendance"""
+def mark_absent_users(target_date: datetime.date = None):
+    """Mark users as absent who didn't record attendance.
+
+    Finds every missing (user, shift, date) triple for active, verified users
+    and active shifts with a single anti-join and writes them with one
+    INSERT ... SELECT, so the run costs one statement regardless of how many
+    members there are. Returns the number of rows written and the time taken.
+    """
     db = SessionLocal()
+    started = time.perf_counter()
+    today = target_date or get_current_indian_time().date()
     try:
-        today = get_current_indian_time().date()
-        
-        # Get all active users
-        active_users = db.query(models.User).filter(
+        now = datetime.datetime.utcnow()
+
+        # Today's recorded (user, shift) pairs, read once and anti-joined
+        # against every active user crossed with every active shift
+        recorded = select(
+            models.Attendance.user_id,
+            models.Attendance.shift_id
+        ).where(
+            models.Attendance.attendance_date == today
+        ).subquery()
+
+        missing = select(
+            models.User.id,
+            models.Shift.id,
+            literal(today, Date),
+            literal('A'),
+            literal(False, Boolean),
+            literal(now, DateTime),
+            literal(now, DateTime)
+        ).select_from(models.User).join(models.Shift, true()).outerjoin(
+            recorded,
+            and_(
+                recorded.c.user_id == models.User.id,
+                recorded.c.shift_id == models.Shift.id
+            )
+        ).where(
             models.User.is_active == True,
-            models.User.is_verified == True
-        ).all()
-        
-        for user in active_users:
-            # Check if user has attendance for today
-            attendance_exists = db.query(models.Attendance).filter(
-                models.Attendance.user_id == user.id,
-                models.Attendance.attendance_date == today
-            ).first()
-            
-            if not attendance_exists:
-                # Get all active shifts
-                shifts = db.query(models.Shift).filter(models.Shift.is_active == True).all()
-                
-                for shift in shifts:
-                    # Create absent record for each shift
-                    absent_attendance = models.Attendance(
-                        user_id=user.id,
-                        shift_id=shift.id,
-                        attendance_date=today,
-                        status='A'  # Absent
-                    )
-                    db.add(absent_attendance)
-        
+            models.User.is_verified == True,
+            models.Shift.is_active == True,
+            recorded.c.user_id.is_(None)
+        )
+
+        result = db.execute(
+            insert(models.Attendance).from_select(
+                ["user_id", "shift_id", "attendance_date", "status",
+                 "timeout_default", "created_at", "updated_at"],
+                missing
+            )
+        )
+        rebuild_rollup(db, today, today)
         db.commit()
-        print(f"Absent users marked for {today}")
-        
+
+        rows_written = result.rowcount
+        elapsed = time.perf_counter() - started
+        print(f"Absent users marked for {today}: {rows_written} rows in {elapsed:.2f}s")
+        return {"date": today, "rows_written": rows_written, "elapsed_seconds": round(elapsed, 3)}
+
     except Exception as e:
         print(f"Error marking absent users: {e}")
         db.rollback()
+        return {"date": today, "rows_written": 0, "elapsed_seconds": round(time.perf_counter() - started, 3), "error": str(e)}
     finally:
         db.close()
 
-def set_default_timeout():
-    """Set default timeout for users who forgot to check out"""
+def add_minutes(db, column, minutes: int):
+    """SQL expression for a DateTime column plus a number of minutes, per dialect"""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.datetime(column, f"+{minutes} minutes")
+    return column + datetime.timedelta(minutes=minutes)
+
+def set_default_timeout(now: datetime.datetime = None):
+    """Set default timeout for users who forgot to check out.
+
+    One UPDATE closes every open row whose time_in is more than
+    DEFAULT_TIMEOUT_MINUTES old, on any day, with time_out = time_in +
+    DEFAULT_TIMEOUT_MINUTES. The partial index on open rows means each run
+    only looks at rows still waiting for a time-out, so it is cheap enough
+    to run every minute. Returns the number of rows closed and the time taken.
+    """
     db = SessionLocal()
+    started = time.perf_counter()
+    # time_in is stored as naive Indian wall-clock time
+    now = now or get_current_indian_time().replace(tzinfo=None)
+    cutoff = now - datetime.timedelta(minutes=settings.DEFAULT_TIMEOUT_MINUTES)
     try:
-        today = get_current_indian_time().date()
-        
-        # Find attendances with time_in but no time_out
-        incomplete_attendances = db.query(models.Attendance).filter(
-            models.Attendance.attendance_date == today,
-            models.Attendance.time_in.isnot(None),
-            models.Attendance.time_out.is_(None),
-            models.Attendance.timeout_default == False
+        closed = db.execute(
+            update(models.Attendance).where(
+                models.Attendance.time_out.is_(None),
+                models.Attendance.time_in.isnot(None),
+                models.Attendance.time_in <= cutoff
+            ).values(
+                time_out=add_minutes(db, models.Attendance.time_in, settings.DEFAULT_TIMEOUT_MINUTES),
+                timeout_default=True,
+                updated_at=datetime.datetime.utcnow()
+            ).returning(
+                models.Attendance.user_id,
+                models.Attendance.attendance_date,
+                models.Attendance.shift_id
+            ).execution_options(synchronize_session=False)
         ).all()
-        
-        for attendance in incomplete_attendances:
-            # Check if it's been more than 1 hour since time_in
-            current_time = get_current_indian_time()
-            
-            if current_time - attendance.time_in > datetime.timedelta(hours=1):
-                attendance.time_out = attendance.time_in + datetime.timedelta(hours=1)
-                attendance.timeout_default = True
-                print(f"Set default timeout for user {attendance.user_id}")
-        
+
+        if closed:
+            gym_by_user = dict(db.execute(
+                select(models.User.id, models.User.gym_id).where(
+                    models.User.id.in_({row.user_id for row in closed})
+                )
+            ).all())
+            groups = Counter(
+                (gym_by_user.get(row.user_id) or NO_GYM, row.attendance_date, row.shift_id) for row in closed
+            )
+            for (gym_id, attendance_date, shift_id), count in groups.items():
+                db.execute(rollup_delta(db, attendance_date, shift_id, gym_id=gym_id, defaulted_timeouts=count))
+
         db.commit()
-        
+
+        elapsed = time.perf_counter() - started
+        if closed:
+            print(f"Default timeout set on {len(closed)} open attendance rows in {elapsed:.2f}s")
+        return {"cutoff": cutoff, "rows_written": len(closed), "elapsed_seconds": round(elapsed, 3)}
+
     except Exception as e:
         print(f"Error setting default timeout: {e}")
         db.rollback()
+        return {"cutoff": cutoff, "rows_written": 0, "elapsed_seconds": round(time.perf_counter() - started, 3), "error": str(e)}
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
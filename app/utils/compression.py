@@ -0,0 +1,186 @@
+# app/utils/compression.py
+"""Negotiated gzip/brotli compression of JSON and HTML responses.
+
+CompressionMiddleware compresses response bodies of the COMPRESSIBLE_TYPES
+that are at least COMPRESSION_MIN_SIZE bytes, in the encoding the client
+prefers among those available: brotli ("br", when the optional brotli
+package is installed) and gzip. Levels come from GZIP_LEVEL and
+BROTLI_QUALITY; benchmarks/compression.py measures the size/CPU trade-off
+behind the defaults. Streaming responses are compressed chunk by chunk and
+flushed, so NDJSON/CSV exports still arrive as they are produced.
+
+Responses that already carry a Content-Encoding (precompressed static
+files, see app/utils/static_assets.py) pass through untouched.
+"""
+import zlib
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/html")
+# Single bodies above this size are compressed off the event loop
+THREADPOOL_MIN_SIZE = 256 * 1024
+
+def available_encodings():
+    """Encodings this process can produce, most preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def choose_encoding(accept_encoding: str, available):
+    """Pick the encoding from available the client accepts with the highest q-value.
+
+    Ties go to the order of available; identity is the fallback (None).
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in available:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+class _GzipStream:
+    def __init__(self, level: int):
+        # wbits 31: gzip container rather than a raw zlib stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+def compress(data: bytes, encoding: str, gzip_level: int = settings.GZIP_LEVEL,
+             brotli_quality: int = settings.BROTLI_QUALITY):
+    """Compress a whole body in one go"""
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+def _is_compressible(headers: Headers, status_code: int):
+    if status_code < 200 or status_code in (204, 206, 304) or "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return content_type in COMPRESSIBLE_TYPES
+
+def _add_vary(headers: MutableHeaders):
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing JSON/HTML bodies the client can decode"""
+
+    def __init__(self, app, minimum_size: int = settings.COMPRESSION_MIN_SIZE,
+                 gzip_level: int = settings.GZIP_LEVEL, brotli_quality: int = settings.BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        sent_start = False
+        stream = None  # set once a streamed body is being compressed
+        passthrough = False
+
+        async def send_start():
+            nonlocal sent_start
+            sent_start = True
+            await send(start_message)
+
+        async def send_wrapper(message):
+            nonlocal start_message, stream, passthrough
+            if message["type"] == "http.response.start":
+                # Headers depend on the first body chunk; hold them until it arrives
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if stream is not None:
+                chunk = stream.compress(body) if body else b""
+                if not more_body:
+                    chunk += stream.finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=list(start_message.get("headers", [])))
+            start_message["headers"] = headers.raw
+            if not _is_compressible(headers, start_message["status"]) or (
+                not more_body and len(body) < self.minimum_size
+            ):
+                passthrough = True
+                await send_start()
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            _add_vary(headers)
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # Same content, different bytes: only a weak validator still holds
+                headers["ETag"] = f"W/{etag}"
+
+            if more_body:
+                del headers["content-length"]
+                stream = _BrotliStream(self.brotli_quality) if encoding == "br" else _GzipStream(self.gzip_level)
+                await send_start()
+                await send({"type": "http.response.body", "body": stream.compress(body), "more_body": True})
+                return
+
+            if len(body) >= THREADPOOL_MIN_SIZE:
+                body = await run_in_threadpool(compress, body, encoding, self.gzip_level, self.brotli_quality)
+            else:
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            headers["Content-Length"] = str(len(body))
+            await send_start()
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+        if start_message is not None and not sent_start:
+            # The app started a response but never sent a body message
+            await send_start()
+            await send({"type": "http.response.body", "body": b""})
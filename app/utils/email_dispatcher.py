@@ -0,0 +1,200 @@
+# app/utils/email_dispatcher.py
+import asyncio
+import logging
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.utils.metrics import email_queue_depth
+
+logger = logging.getLogger(__name__)
+
+class SmtpConnection:
+    """One authenticated SMTP connection, reused across messages.
+
+    Opened lazily, closed after EMAIL_IDLE_TIMEOUT seconds without a send and
+    reopened transparently when the server has dropped it.
+    """
+
+    def __init__(self):
+        self._server = None
+        self._last_used = 0.0
+
+    def _open(self):
+        server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT, timeout=settings.EMAIL_SMTP_TIMEOUT)
+        if settings.SMTP_STARTTLS:
+            server.starttls()
+        if settings.SMTP_USERNAME:
+            server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        self._server = server
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def send_batch(self, messages):
+        """Send messages over this connection; returns the ones that failed"""
+        if self._server is not None and time.monotonic() - self._last_used > settings.EMAIL_IDLE_TIMEOUT:
+            self.close()
+
+        failed = []
+        for msg in messages:
+            try:
+                if self._server is None:
+                    self._open()
+                self._server.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                # The connection is unusable; drop it so the retry reconnects
+                logger.warning(f"SMTP connection lost sending to {msg['To']}: {e}")
+                self._server = None
+                failed.append(msg)
+            except smtplib.SMTPException as e:
+                logger.warning(f"SMTP error sending to {msg['To']}: {e}")
+                failed.append(msg)
+        self._last_used = time.monotonic()
+        return failed
+
+class EmailDispatcher:
+    """In-process email queue drained by a few async workers.
+
+    Request handlers call enqueue() and return immediately. Each worker owns
+    one SmtpConnection and a slot in a dedicated thread pool, pulls up to
+    EMAIL_BATCH_SIZE messages at a time and sends them over that connection.
+    Failed messages are retried with exponential backoff up to
+    EMAIL_MAX_RETRIES times; on stop() retries still waiting out their
+    backoff are queued at once and flushed with the rest. When the
+    dispatcher isn't running (scripts, tests without a lifespan) enqueue()
+    sends synchronously instead.
+    """
+
+    def __init__(self, workers: int = settings.EMAIL_WORKERS):
+        self.workers = workers
+        self._queue = None
+        self._tasks = []
+        self._executor = None
+        # Backoff timers of failed messages: TimerHandle -> (msg, attempt)
+        self._retries = {}
+        self._stopping = False
+        self.stats = {
+            "queued": 0,
+            "sent": 0,
+            "retried": 0,
+            "failed": 0,       # gave up after EMAIL_MAX_RETRIES
+            "dropped": 0,      # queue was full
+            "batches": 0,
+        }
+
+    @property
+    def is_running(self):
+        return bool(self._tasks)
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.EMAIL_QUEUE_MAX)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="smtp")
+        self._tasks = [
+            asyncio.create_task(self._worker(SmtpConnection()), name=f"email-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = settings.EMAIL_SHUTDOWN_TIMEOUT):
+        """Flush the queue (waiting at most `timeout` seconds), then close connections"""
+        if not self.is_running:
+            return
+        # Failures from here on are not retried, pending retries go out now
+        self._stopping = True
+        for handle, (msg, attempt) in list(self._retries.items()):
+            handle.cancel()
+            self._requeue(handle, msg, attempt)
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Email queue not drained on shutdown, {self._queue.qsize()} messages lost")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._stopping = False
+
+    def enqueue(self, msg, attempt: int = 0):
+        """Queue a message for delivery; never blocks the caller"""
+        if not self.is_running:
+            failed = SmtpConnection().send_batch([msg])
+            self.stats["sent" if not failed else "failed"] += 1
+            return
+        try:
+            self._queue.put_nowait((msg, attempt))
+            self.stats["queued"] += 1
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.error(f"Email queue full, dropped message to {msg['To']}")
+
+    def _next_batch(self, first):
+        batch = [first]
+        while len(batch) < settings.EMAIL_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _worker(self, connection: SmtpConnection):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                batch = self._next_batch(await self._queue.get())
+                try:
+                    failed = await loop.run_in_executor(
+                        self._executor, connection.send_batch, [msg for msg, _ in batch]
+                    )
+                except Exception as e:
+                    logger.error(f"Email batch failed: {e}")
+                    failed = [msg for msg, _ in batch]
+                self.stats["batches"] += 1
+                self.stats["sent"] += len(batch) - len(failed)
+
+                attempts = {id(msg): attempt for msg, attempt in batch}
+                for msg in failed:
+                    self._schedule_retry(msg, attempts[id(msg)] + 1)
+
+                for _ in batch:
+                    self._queue.task_done()
+        finally:
+            await loop.run_in_executor(self._executor, connection.close)
+
+    def _schedule_retry(self, msg, attempt: int):
+        if attempt > settings.EMAIL_MAX_RETRIES or self._stopping:
+            self.stats["failed"] += 1
+            logger.error(f"Giving up on email to {msg['To']} after {attempt} attempts")
+            return
+        self.stats["retried"] += 1
+        delay = settings.EMAIL_RETRY_BACKOFF * 2 ** (attempt - 1)
+        handle = asyncio.get_running_loop().call_later(delay, lambda: self._requeue(handle, msg, attempt))
+        self._retries[handle] = (msg, attempt)
+
+    def _requeue(self, handle, msg, attempt: int):
+        # Runs on the event loop: only ever queue, never send from here
+        self._retries.pop(handle, None)
+        if not self.is_running:
+            self.stats["failed"] += 1
+            logger.error(f"Email dispatcher stopped, dropped retry to {msg['To']}")
+            return
+        try:
+            self._queue.put_nowait((msg, attempt))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.error(f"Email queue full, dropped retry to {msg['To']}")
+
+email_dispatcher = EmailDispatcher()
+email_queue_depth.set_function(lambda: email_dispatcher.queue_depth)
@@ -0,0 +1,326 @@
+# app/utils/metrics.py
+"""Process-local metrics exposed in the Prometheus text format at /metrics.
+
+A small, dependency-free subset of the Prometheus client: counters, gauges
+and histograms with labels. Recording a sample is one lock and a few
+additions. Each uvicorn worker keeps its own numbers; scrape workers
+individually or aggregate them in Prometheus, like any multi-process app.
+
+Collected here:
+- per-route request counts and latency, in-flight requests (MetricsMiddleware)
+- DB queries per request and total query time (cursor execute events)
+- pool checkouts and time spent waiting for a connection (instrument_engine)
+Other modules record into the metrics they own (password hashing in
+app/core/security.py) or register gauges read at scrape time (email queue).
+
+With QUERY_INSTRUMENTATION on, each response also carries its statement
+count and DB time (X-DB-Queries and Server-Timing headers), and a warning
+is logged when one SQL statement runs QUERY_REPEAT_WARN_THRESHOLD or more
+times in a single request, the usual sign of an N+1 loop.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter as StatementCounter
+from sqlalchemy import event
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond cache hits up to slow bcrypt and exports
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in items]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    """A gauge set directly, or read from `function` at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames=(), function=None):
+        super().__init__(name, help, labelnames)
+        self.function = function
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set_function(self, function):
+        """function() returns a number, or a {label values tuple: number} dict for labelled gauges"""
+        self.function = function
+
+    def _samples(self):
+        if self.function is not None:
+            value = self.function()
+            values = value if isinstance(value, dict) else {(): value}
+            with self._lock:
+                self._values = dict(values)
+        return super()._samples()
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket (not cumulative) counts, then sum and count
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = [(labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items()]
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = _format_value(bound if bound == float("inf") else float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template, method and status", ("route", "method", "status")
+))
+http_request_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and method", ("route", "method")
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled"
+))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed while handling one request", ("route",), buckets=COUNT_BUCKETS
+))
+db_queries = registry.register(Counter(
+    "db_queries_total", "SQL statements executed, by engine", ("engine",)
+))
+db_query_seconds = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time, by engine", ("engine",)
+))
+db_pool_checkouts = registry.register(Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool, by engine", ("engine",)
+))
+db_pool_wait_seconds = registry.register(Histogram(
+    "db_pool_wait_seconds", "Time spent waiting to check a connection out of the pool", ("engine",)
+))
+db_pool_checked_out = registry.register(Gauge(
+    "db_pool_checked_out", "Connections currently checked out, by engine", ("engine",)
+))
+password_hash_seconds = registry.register(Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time on the hashing pool, excluding queueing", ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+))
+email_queue_depth = registry.register(Gauge(
+    "email_queue_depth", "Emails waiting in the dispatcher queue"
+))
+
+class RequestQueries:
+    """Statements run while handling one request.
+
+    Shared by reference, so threadpool copies of the request context
+    (sync handlers and get_db sessions) add to the same counts.
+    """
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self, track_statements: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        # SQL text -> executions; bound parameters are not part of the text
+        self.statements = StatementCounter() if track_statements else None
+
+    def repeated(self, threshold: int):
+        if not self.statements:
+            return []
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+_request_queries = contextvars.ContextVar("request_queries", default=None)
+
+def current_request_queries():
+    """The RequestQueries of the request being handled, or None outside a request"""
+    return _request_queries.get()
+
+def instrument_engine(db_engine, label: str):
+    """Count and time statements and pool checkouts for one engine.
+
+    Pass the sync engine (async_engine.sync_engine for async ones).
+    """
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        db_queries.inc(label)
+        db_query_seconds.observe(elapsed, label)
+        queries = _request_queries.get()
+        if queries is not None:
+            queries.count += 1
+            queries.seconds += elapsed
+            if queries.statements is not None:
+                queries.statements[statement] += 1
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts.inc(label)
+
+    def timed_pool(pool):
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            finally:
+                db_pool_wait_seconds.observe(time.perf_counter() - started, label)
+
+        pool.connect = timed_connect
+
+    event.listen(db_engine, "before_cursor_execute", before_execute)
+    event.listen(db_engine, "after_cursor_execute", after_execute)
+    event.listen(db_engine.pool, "checkout", on_checkout)
+    timed_pool(db_engine.pool)
+    # dispose() swaps in a new pool (events carry over, the timing wrapper doesn't)
+    event.listen(db_engine, "engine_disposed", lambda engine: timed_pool(engine.pool))
+
+# id(route) -> its full path template; included routers only know their own suffix
+_route_templates = {}
+
+def route_template(scope):
+    """Full path template of the matched route, e.g. "/api/v1/users/{user_id}" """
+    route = scope.get("route")
+    if route is None or not hasattr(route, "path_regex"):
+        return "unmatched"
+    template = _route_templates.get(id(route))
+    if template is None:
+        # The route's regex matches the tail of the path after its routers' prefixes
+        path = scope["path"]
+        prefix = next(
+            (path[:i] for i in range(len(path)) if path[i] == "/" and route.path_regex.match(path[i:])),
+            ""
+        )
+        template = _route_templates.setdefault(id(route), prefix + route.path)
+    return template
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request count, latency and query count per route.
+
+    Routes are labelled with their path template ("/api/v1/users/{user_id}"),
+    never the raw path, so label cardinality stays bounded; requests that
+    match no route are labelled "unmatched".
+    """
+
+    def __init__(self, app, exclude=("/metrics",), instrument_queries: bool = settings.QUERY_INSTRUMENTATION):
+        self.app = app
+        self.exclude = set(exclude)
+        self.instrument_queries = instrument_queries
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = [500]
+        queries = RequestQueries(track_statements=self.instrument_queries)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+                if self.instrument_queries:
+                    # Queries made while a streaming body is sent come after these headers
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-db-queries", str(queries.count).encode()),
+                        (b"server-timing", f'db;dur={queries.seconds * 1000:.1f};desc="{queries.count} queries"'.encode()),
+                    ]
+            await send(message)
+
+        token = _request_queries.set(queries)
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            _request_queries.reset(token)
+            route = route_template(scope)
+            http_requests.inc(route, scope["method"], str(status_code[0]))
+            http_request_seconds.observe(elapsed, route, scope["method"])
+            db_queries_per_request.observe(queries.count, route)
+            for statement, count in queries.repeated(settings.QUERY_REPEAT_WARN_THRESHOLD):
+                logger.warning(
+                    f"Possible N+1: {count} executions of one statement in {scope['method']} {route}: "
+                    f"{' '.join(statement.split())}"
+                )
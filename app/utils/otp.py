@@ -1,13 +1,13 @@
 import random
-import smtplib
+from fastapi.concurrency import run_in_threadpool
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from datetime import datetime, timedelta
 from app.core.config import settings
+from app.utils.email_dispatcher import email_dispatcher
+from app.utils.otp_store import create_otp_store
 
-# In-memory OTP store (for development)
-# In production, consider using Redis or a proper database
-otp_store = {}
+# Backend chosen by OTP_STORE_BACKEND; use "sql" or "redis" with more than one worker
+otp_store = create_otp_store()
 
 def generate_otp(length=6):
     """Generate a numeric OTP of specified length"""
@@ -15,11 +15,7 @@ def generate_otp(length=6):
 
 def store_otp(email: str, otp: str, expiry_minutes=10):
     """Store OTP with expiry time"""
-    expiry_time = datetime.utcnow() + timedelta(minutes=expiry_minutes)
-    otp_store[email] = {
-        "otp": otp,
-        "expiry": expiry_time
-    }
+    otp_store.set(email, otp, expiry_minutes * 60)
 
 def get_otp(email: str):
     """Retrieve OTP from store"""
@@ -27,66 +23,50 @@ def get_otp(email: str):
 
 def delete_otp(email: str):
     """Remove OTP from store"""
-    if email in otp_store:
-        del otp_store[email]
+    otp_store.delete(email)
 
 def verify_otp(email: str, otp: str):
-    """Verify if OTP is valid and not expired"""
-    stored_data = get_otp(email)
-    if not stored_data:
-        return False
+    """Verify if OTP is valid and not expired; a matching OTP is used up"""
+    return otp_store.consume(email, otp)
+
+async def store_otp_async(email: str, otp: str, expiry_minutes=10):
+    """store_otp() on the threadpool, for async handlers (the store may do I/O)"""
+    await run_in_threadpool(store_otp, email, otp, expiry_minutes)
+
+async def verify_otp_async(email: str, otp: str):
+    """verify_otp() on the threadpool, for async handlers"""
+    return await run_in_threadpool(verify_otp, email, otp)
+
+def build_otp_message(email: str, otp: str):
+    """Build the OTP verification email"""
+    msg = MIMEMultipart()
+    msg['From'] = settings.FROM_EMAIL
+    msg['To'] = email
+    msg['Subject'] = "Your Gym Management System Verification OTP"
     
-    if stored_data["expiry"] < datetime.utcnow():
-        delete_otp(email)  # Clean up expired OTP
-        return False
+    body = f"""
+    <html>
+        <body>
+            <h2>Gym Management System - Email Verification</h2>
+            <p>Your verification code is: <strong>{otp}</strong></p>
+            <p>This code will expire in 10 minutes.</p>
+            <p>If you didn't request this code, please ignore this email.</p>
+        </body>
+    </html>
+    """
     
-    if stored_data["otp"] == otp:
-        delete_otp(email)  # Clean up used OTP
-        return True
-    
-    return False
+    msg.attach(MIMEText(body, 'html'))
+    return msg
 
 def send_email_otp(email: str, otp: str):
-    """Send OTP to user's email"""
-    if not all([settings.SMTP_SERVER, settings.SMTP_PORT, 
-                settings.SMTP_USERNAME, settings.SMTP_PASSWORD]):
+    """Queue the OTP email for delivery; returns without waiting on SMTP"""
+    # A plaintext server without credentials is a local relay or stand-in
+    credentials = [settings.SMTP_USERNAME, settings.SMTP_PASSWORD] if settings.SMTP_STARTTLS else []
+    if not all([settings.SMTP_SERVER, settings.SMTP_PORT, *credentials]):
         print(f"Email configuration incomplete. Would send OTP {otp} to {email}")
         return
     
-    try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = settings.FROM_EMAIL
-        msg['To'] = email
-        msg['Subject'] = "Your Gym Management System Verification OTP"
-        
-        body = f"""
-        <html>
-            <body>
-                <h2>Gym Management System - Email Verification</h2>
-                <p>Your verification code is: <strong>{otp}</strong></p>
-                <p>This code will expire in 10 minutes.</p>
-                <p>If you didn't request this code, please ignore this email.</p>
-            </body>
-        </html>
-        """
-        
-        msg.attach(MIMEText(body, 'html'))
-        
-        # Send email
-        server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT)
-        server.starttls()
-        print(settings.SMTP_SERVER, settings.SMTP_PORT,settings.SMTP_USERNAME, settings.SMTP_PASSWORD,settings.FROM_EMAIL)
-        server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        
-        print(f"OTP sent successfully to {email}")
-        
-    except Exception as e:
-        print(f"Failed to send email: {e}")
-        # In development, we'll just print the OTP
-        print(f"OTP for {email}: {otp}")
+    email_dispatcher.enqueue(build_otp_message(email, otp))
 
 
 # import smtplib
@@ -0,0 +1,230 @@
+# app/utils/otp_store.py
+import heapq
+import logging
+from abc import ABC, abstractmethod
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal, dialect_insert
+
+logger = logging.getLogger(__name__)
+
+class OtpStore(ABC):
+    """Where pending OTPs live between sending and verification.
+
+    Every backend stores one OTP per email with a TTL and implements
+    consume() as a single atomic compare-and-delete, so two workers verifying
+    the same code can't both succeed, while a wrong guess leaves the code in
+    place.
+    """
+
+    @abstractmethod
+    def set(self, email: str, otp: str, ttl_seconds: int):
+        ...
+
+    @abstractmethod
+    def get(self, email: str):
+        """Return {"otp", "expiry"} for a live OTP, or None"""
+
+    @abstractmethod
+    def consume(self, email: str, otp: str):
+        """Atomically delete the OTP for email if it is live and equals otp; returns whether it did"""
+
+    @abstractmethod
+    def delete(self, email: str):
+        ...
+
+    def evict_expired(self):
+        """Drop expired entries; returns how many were removed"""
+        return 0
+
+    def start_eviction(self, interval_seconds: float = settings.OTP_EVICTION_INTERVAL):
+        """Run evict_expired() every interval_seconds on a daemon thread"""
+        if getattr(self, "_eviction_thread", None) is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    self.evict_expired()
+                except Exception as e:
+                    logger.error(f"Error evicting expired OTPs: {e}")
+
+        self._eviction_thread = threading.Thread(target=run, name="otp-eviction", daemon=True)
+        self._eviction_thread.start()
+
+class MemoryOtpStore(OtpStore):
+    """Process-local store. Only correct with a single worker process.
+
+    Expiries are also pushed onto a min-heap, so eviction pops just the
+    expired entries instead of scanning the whole dict. Heap entries left
+    behind by re-sent or verified OTPs are skipped when they surface.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._expiries = []
+
+    def set(self, email: str, otp: str, ttl_seconds: int):
+        expiry = datetime.utcnow() + timedelta(seconds=ttl_seconds)
+        with self._lock:
+            self._entries[email] = {"otp": otp, "expiry": expiry}
+            heapq.heappush(self._expiries, (expiry, email))
+
+    def get(self, email: str):
+        entry = self._entries.get(email)
+        if entry is None or entry["expiry"] < datetime.utcnow():
+            return None
+        return dict(entry)
+
+    def consume(self, email: str, otp: str):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry["expiry"] < datetime.utcnow() or entry["otp"] != otp:
+                return False
+            del self._entries[email]
+        return True
+
+    def delete(self, email: str):
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def evict_expired(self):
+        now = datetime.utcnow()
+        evicted = 0
+        with self._lock:
+            while self._expiries and self._expiries[0][0] < now:
+                expiry, email = heapq.heappop(self._expiries)
+                entry = self._entries.get(email)
+                if entry is not None and entry["expiry"] == expiry:
+                    del self._entries[email]
+                    evicted += 1
+        return evicted
+
+    def __len__(self):
+        return len(self._entries)
+
+class SqlOtpStore(OtpStore):
+    """Stores OTPs in the otp_code table, shared by every worker on the database.
+
+    consume() is one DELETE matching email, code and expiry, and eviction is
+    a range delete on the expires_at index.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def set(self, email: str, otp: str, ttl_seconds: int):
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl_seconds)
+        with self.session_factory() as db:
+            stmt = dialect_insert(db)(models.OtpCode).values(email=email, otp=otp, expires_at=expires_at)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["email"],
+                set_={"otp": stmt.excluded.otp, "expires_at": stmt.excluded.expires_at}
+            )
+            db.execute(stmt)
+            db.commit()
+
+    def get(self, email: str):
+        with self.session_factory() as db:
+            row = db.get(models.OtpCode, email)
+            if row is None or row.expires_at < datetime.utcnow():
+                return None
+            return {"otp": row.otp, "expiry": row.expires_at}
+
+    def consume(self, email: str, otp: str):
+        with self.session_factory() as db:
+            result = db.execute(
+                delete(models.OtpCode).where(
+                    models.OtpCode.email == email,
+                    models.OtpCode.otp == otp,
+                    models.OtpCode.expires_at >= datetime.utcnow()
+                )
+            )
+            db.commit()
+            return result.rowcount == 1
+
+    def delete(self, email: str):
+        with self.session_factory() as db:
+            db.execute(delete(models.OtpCode).where(models.OtpCode.email == email))
+            db.commit()
+
+    def evict_expired(self):
+        with self.session_factory() as db:
+            result = db.execute(
+                delete(models.OtpCode).where(models.OtpCode.expires_at < datetime.utcnow())
+            )
+            db.commit()
+            return result.rowcount
+
+class RedisOtpStore(OtpStore):
+    """Stores OTPs as Redis keys with a native TTL, so no eviction is needed.
+
+    consume() deletes the key under WATCH only if it still holds the code.
+    Any client with the redis-py interface works, e.g. fakeredis for a local
+    stand-in.
+    """
+
+    def __init__(self, client=None, prefix: str = "otp:"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(settings.OTP_REDIS_URL, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, email: str):
+        return self.prefix + email
+
+    def set(self, email: str, otp: str, ttl_seconds: int):
+        self.client.set(self._key(email), otp, ex=ttl_seconds)
+
+    def get(self, email: str):
+        key = self._key(email)
+        pipe = self.client.pipeline()
+        pipe.get(key)
+        pipe.ttl(key)
+        otp, ttl = pipe.execute()
+        if otp is None:
+            return None
+        return {"otp": otp, "expiry": datetime.utcnow() + timedelta(seconds=max(ttl, 0))}
+
+    def consume(self, email: str, otp: str):
+        from redis.exceptions import WatchError
+
+        key = self._key(email)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                # Redis already dropped it if it had expired
+                if pipe.get(key) != otp:
+                    return False
+                pipe.multi()
+                pipe.delete(key)
+                return pipe.execute()[0] == 1
+            except WatchError:
+                # Re-sent or consumed by another worker in between
+                return False
+
+    def delete(self, email: str):
+        self.client.delete(self._key(email))
+
+    def start_eviction(self, interval_seconds: float = settings.OTP_EVICTION_INTERVAL):
+        # Keys expire on their own
+        pass
+
+OTP_STORE_BACKENDS = {
+    "memory": MemoryOtpStore,
+    "sql": SqlOtpStore,
+    "redis": RedisOtpStore,
+}
+
+def create_otp_store(backend: str = settings.OTP_STORE_BACKEND):
+    try:
+        return OTP_STORE_BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(f"Unknown OTP store backend {backend!r}; expected one of {sorted(OTP_STORE_BACKENDS)}")
@@ -0,0 +1,86 @@
+# app/utils/pincode_index.py
+import bisect
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from sqlalchemy import event, select
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal
+
+# Everything the registration form needs to know about a pincode
+PincodeEntry = namedtuple("PincodeEntry", ["id", "pincode", "district", "state_name", "country_name", "state_country_id"])
+
+PINCODE_ROWS = select(
+    models.Pincode.id,
+    models.Pincode.pincode,
+    models.Pincode.district,
+    models.StateCountry.state_name,
+    models.StateCountry.country_name,
+    models.Pincode.state_country_id
+).outerjoin(models.StateCountry, models.StateCountry.id == models.Pincode.state_country_id)
+
+class PincodeIndex:
+    """Process-local, read-only map of every pincode to its place.
+
+    Each load builds a new snapshot (a sorted tuple of codes for prefix
+    search plus a read-only dict) and swaps it in with one assignment, so
+    readers never take a lock and never see a half-built index. About 19k
+    Indian pincodes fit in a few MB. Like the shift schedule, the index is
+    marked stale by ORM writes to pincodes or states and reloaded after
+    PINCODE_INDEX_TTL_SECONDS so other workers' writes are picked up.
+    """
+
+    def __init__(self, ttl_seconds: int = settings.PINCODE_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot = ((), MappingProxyType({}))
+        self._loaded_at = None
+
+    @property
+    def is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def load(self, db=None):
+        """(Re)build the index from the database, opening a session if none is given"""
+        with self._lock:
+            if db is None:
+                with SessionLocal() as session:
+                    rows = session.execute(PINCODE_ROWS).all()
+            else:
+                rows = db.execute(PINCODE_ROWS).all()
+            entries = {row.pincode: PincodeEntry(*row) for row in rows}
+            self._snapshot = (tuple(sorted(entries)), MappingProxyType(entries))
+            self._loaded_at = time.monotonic()
+        return self
+
+    def ensure_loaded(self):
+        if self.is_stale:
+            self.load()
+        return self
+
+    def get(self, pincode: str):
+        return self._snapshot[1].get(pincode)
+
+    def search(self, prefix: str, limit: int = settings.PINCODE_SEARCH_LIMIT):
+        """Entries whose code starts with prefix, in code order"""
+        codes, entries = self._snapshot
+        start = bisect.bisect_left(codes, prefix)
+        end = bisect.bisect_left(codes, prefix + "\uffff", lo=start)
+        return [entries[code] for code in codes[start:min(end, start + limit)]]
+
+    def __len__(self):
+        return len(self._snapshot[1])
+
+pincode_index = PincodeIndex()
+
+def _invalidate_pincode_index(mapper, connection, target):
+    pincode_index.invalidate()
+
+for _model in (models.Pincode, models.StateCountry):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _invalidate_pincode_index)
@@ -0,0 +1,149 @@
+# app/utils/pincode_loader.py
+"""Bulk load of a postal-directory CSV into the pincode and state_country tables.
+
+The India Post "all India pincode directory" export works as is (one row
+per post office, with pincode, districtname/district and statename columns).
+Any CSV with a pincode column and a state column is accepted; an optional
+country column overrides PINCODE_DEFAULT_COUNTRY. Rows are streamed and
+written in batches of PINCODE_BATCH_SIZE, each in its own transaction, with
+pincodes upserted so reloading a newer directory updates them in place:
+
+    python -m app.utils.pincode_loader all_india_pincode.csv [--batch-size N]
+"""
+import argparse
+import csv
+import time
+from sqlalchemy import select
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal, dialect_insert
+from app.utils.pincode_index import pincode_index
+from app.utils.table_versions import bump_table_versions
+
+# Accepted header spellings, compared lower-cased with spaces and underscores removed
+COLUMN_ALIASES = {
+    "pincode": ("pincode", "pin", "postalcode"),
+    "district": ("district", "districtname"),
+    "state": ("statename", "state"),
+    "country": ("country", "countryname"),
+}
+
+def _normalise_header(name: str):
+    return name.strip().lower().replace(" ", "").replace("_", "")
+
+def _column_map(fieldnames):
+    normalised = {_normalise_header(name): name for name in fieldnames or []}
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        columns[key] = next((normalised[alias] for alias in aliases if alias in normalised), None)
+    if columns["pincode"] is None or columns["state"] is None:
+        raise ValueError("CSV needs a pincode column and a state column")
+    return columns
+
+def _display_name(value: str):
+    # The postal directory is all upper case ("TAMIL NADU")
+    value = " ".join(value.split())
+    return value.title() if value.isupper() else value
+
+def _write_batch(db, batch, states):
+    """Create any new states, then upsert the batch of pincodes; returns states created"""
+    new_states = {
+        key: models.StateCountry(state_name=state_name, country_name=country_name)
+        for key, (state_name, country_name) in {
+            (state.casefold(), country.casefold()): (state, country)
+            for state, country, _ in batch.values()
+        }.items()
+        if key not in states
+    }
+    if new_states:
+        db.add_all(new_states.values())
+        db.flush()
+        states.update({key: state.id for key, state in new_states.items()})
+
+    stmt = dialect_insert(db)(models.Pincode).values([
+        {
+            "pincode": code,
+            "district": district,
+            "state_country_id": states[(state.casefold(), country.casefold())],
+        }
+        for code, (state, country, district) in batch.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["pincode"],
+        set_={"district": stmt.excluded.district, "state_country_id": stmt.excluded.state_country_id}
+    ))
+    bump_table_versions(db, ["pincode"])
+    db.commit()
+    return len(new_states)
+
+def load_pincode_csv(stream, batch_size: int = settings.PINCODE_BATCH_SIZE,
+                     country: str = settings.PINCODE_DEFAULT_COUNTRY):
+    """Stream CSV text from a file-like object into the database in batches.
+
+    Rows without a valid six-digit pincode or a state are counted as skipped;
+    repeated pincodes (several post offices share one) keep the first row.
+    Returns counts for the whole load.
+    """
+    started = time.perf_counter()
+    reader = csv.DictReader(stream)
+    columns = _column_map(reader.fieldnames)
+    result = {"rows_read": 0, "pincodes_written": 0, "states_created": 0, "skipped": 0}
+    seen = set()
+    batch = {}
+
+    db = SessionLocal()
+    try:
+        states = {
+            (state_name.casefold(), country_name.casefold()): state_id
+            for state_id, state_name, country_name in db.execute(
+                select(models.StateCountry.id, models.StateCountry.state_name, models.StateCountry.country_name)
+            )
+        }
+
+        for row in reader:
+            result["rows_read"] += 1
+            code = (row.get(columns["pincode"]) or "").strip()
+            state = (row.get(columns["state"]) or "").strip()
+            if len(code) != 6 or not code.isdigit() or not state:
+                result["skipped"] += 1
+                continue
+            if code in seen:
+                continue
+            seen.add(code)
+
+            district = (row.get(columns["district"]) or "").strip() if columns["district"] else ""
+            row_country = (row.get(columns["country"]) or "").strip() if columns["country"] else ""
+            batch[code] = (_display_name(state), _display_name(row_country or country), _display_name(district) or None)
+
+            if len(batch) >= batch_size:
+                result["states_created"] += _write_batch(db, batch, states)
+                result["pincodes_written"] += len(batch)
+                batch = {}
+
+        if batch:
+            result["states_created"] += _write_batch(db, batch, states)
+            result["pincodes_written"] += len(batch)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        # Core upserts don't fire ORM events
+        pincode_index.invalidate()
+
+    result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+if __name__ == "__main__":
+    from app.db.database import Base, engine
+    from app.db.init_data import ensure_columns
+    Base.metadata.create_all(bind=engine)
+    ensure_columns()
+
+    parser = argparse.ArgumentParser(description="Load a postal-directory CSV into pincode and state_country")
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=settings.PINCODE_BATCH_SIZE)
+    parser.add_argument("--country", default=settings.PINCODE_DEFAULT_COUNTRY)
+    args = parser.parse_args()
+    with open(args.path, newline="", encoding="utf-8-sig") as stream:
+        print(load_pincode_csv(stream, args.batch_size, args.country))
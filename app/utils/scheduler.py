@@ -0,0 +1,235 @@
+# app/utils/scheduler.py
+"""In-process scheduler for the attendance maintenance jobs.
+
+Each job has a cron expression (minute hour day month weekday) evaluated in
+SCHEDULER_TIMEZONE. Every uvicorn worker runs the same scheduler, but before
+running a job a worker claims that job's scheduled fire time in the
+job_lease table with one atomic upsert. The claim only succeeds if the
+stored fire time is older and the previous lease has expired or was released,
+so exactly one worker runs each fire time. The job itself runs in a thread
+so the event loop keeps serving requests, and every run is written to job_run
+with its duration and rows affected.
+"""
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import time
+import uuid
+import pytz
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal, dialect_insert
+from app.utils.attendance_tasks import mark_absent_users, set_default_timeout
+
+logger = logging.getLogger(__name__)
+
+Lease = models.JobLease
+
+# Field ranges in cron order: minute, hour, day of month, month, day of week (0 or 7 = Sunday)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+def _parse_field(field: str, low: int, high: int):
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = map(int, part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"cron field {field!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+class CronSchedule:
+    """A five-field cron expression such as "55 23 * * *" or "*/5 6-22 * * 1-6"."""
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression {expression!r} needs 5 fields")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        # Standard cron: when both day fields are restricted, either may match
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, day: datetime.datetime):
+        in_days = day.day in self.days
+        in_weekdays = day.isoweekday() % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, after: datetime.datetime):
+        """First naive wall-clock minute strictly after `after` that matches"""
+        moment = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        # Four years covers every reachable day/month combination (e.g. Feb 29)
+        limit = moment + datetime.timedelta(days=4 * 366)
+        while moment < limit:
+            if moment.month not in self.months:
+                month = moment.month % 12 + 1
+                moment = moment.replace(year=moment.year + (month == 1), month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + datetime.timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"cron expression {self.expression!r} never matches")
+
+class ScheduledJob:
+    def __init__(self, name: str, func, schedule: str):
+        self.name = name
+        self.func = func
+        self.schedule = CronSchedule(schedule)
+        self.stats = {"runs": 0, "skipped": 0, "failed": 0, "last_run": None}
+
+class Scheduler:
+    """Runs registered jobs on their cron schedules, one worker per fire time.
+
+    start() needs a running event loop (call it from an async startup hook);
+    stop() cancels the sleeping tasks and waits for any job in progress.
+    """
+
+    def __init__(self, timezone: str = settings.SCHEDULER_TIMEZONE):
+        self.timezone = pytz.timezone(timezone)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs = {}
+        self._tasks = []
+
+    @property
+    def is_running(self):
+        return bool(self._tasks)
+
+    def add_job(self, name: str, func, schedule: str):
+        """Register a sync function returning a dict with "rows_written" (and "error" on failure)"""
+        self.jobs[name] = ScheduledJob(name, func, schedule)
+
+    def start(self):
+        if self.is_running:
+            return
+        self._tasks = [
+            asyncio.create_task(self._loop(job), name=f"scheduler-{job.name}")
+            for job in self.jobs.values()
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def next_fire_at(self, job: ScheduledJob, now: datetime.datetime = None):
+        """Next fire time of a job as an aware datetime in the scheduler's timezone"""
+        now = now or datetime.datetime.now(self.timezone)
+        local = now.astimezone(self.timezone).replace(tzinfo=None)
+        return self.timezone.localize(job.schedule.next_after(local))
+
+    async def _loop(self, job: ScheduledJob):
+        while True:
+            fire_at = self.next_fire_at(job)
+            delay = (fire_at - datetime.datetime.now(self.timezone)).total_seconds()
+            await asyncio.sleep(max(0.0, delay))
+            try:
+                await asyncio.to_thread(self.run_once, job, fire_at)
+            except Exception as e:
+                # A failed lease or run record must not end the loop
+                logger.error(f"Scheduler error in job {job.name}: {e}")
+
+    def _utc(self, moment: datetime.datetime):
+        return moment.astimezone(pytz.utc).replace(tzinfo=None)
+
+    def claim(self, db, job: ScheduledJob, fire_at: datetime.datetime):
+        """Atomically take the lease for this fire time; True if this worker won it"""
+        now = datetime.datetime.utcnow()
+        stmt = dialect_insert(db)(Lease).values(
+            job_name=job.name,
+            owner=self.owner,
+            fire_at=self._utc(fire_at),
+            expires_at=now + datetime.timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["job_name"],
+            set_={"owner": stmt.excluded.owner, "fire_at": stmt.excluded.fire_at, "expires_at": stmt.excluded.expires_at},
+            where=(Lease.fire_at < stmt.excluded.fire_at) & (Lease.expires_at <= now)
+        ).returning(Lease.owner)
+        won = db.execute(stmt).scalar() == self.owner
+        db.commit()
+        return won
+
+    def release(self, db, job: ScheduledJob):
+        """Let the lease lapse now that the run is finished"""
+        db.query(Lease).filter(Lease.job_name == job.name, Lease.owner == self.owner).update(
+            {"expires_at": datetime.datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+
+    def run_once(self, job: ScheduledJob, fire_at: datetime.datetime):
+        """Claim, run and record one fire time of a job. Blocking; call it in a thread."""
+        db = SessionLocal()
+        try:
+            if not self.claim(db, job, fire_at):
+                job.stats["skipped"] += 1
+                return None
+
+            started_at = datetime.datetime.utcnow()
+            started = time.perf_counter()
+            try:
+                result = job.func() or {}
+                error = result.get("error")
+            except Exception as e:
+                result, error = {}, str(e)
+            duration = time.perf_counter() - started
+
+            run = models.JobRun(
+                job_name=job.name,
+                owner=self.owner,
+                fire_at=self._utc(fire_at),
+                started_at=started_at,
+                duration_seconds=round(duration, 3),
+                rows_affected=result.get("rows_written"),
+                error=error
+            )
+            db.add(run)
+            db.commit()
+            self.release(db, job)
+
+            job.stats["runs"] += 1
+            job.stats["failed"] += bool(error)
+            job.stats["last_run"] = {
+                "fire_at": fire_at.isoformat(),
+                "duration_seconds": run.duration_seconds,
+                "rows_affected": run.rows_affected,
+                "error": error,
+            }
+            if error:
+                logger.error(f"Job {job.name} failed after {duration:.2f}s: {error}")
+            else:
+                logger.info(f"Job {job.name} finished in {duration:.2f}s, {run.rows_affected} rows")
+            return run
+        finally:
+            db.close()
+
+    def stats(self):
+        return {
+            name: {**job.stats, "schedule": job.schedule.expression, "next_fire_at": self.next_fire_at(job).isoformat()}
+            for name, job in self.jobs.items()
+        }
+
+scheduler = Scheduler()
+scheduler.add_job("mark_absent_users", mark_absent_users, settings.MARK_ABSENT_SCHEDULE)
+scheduler.add_job("set_default_timeout", set_default_timeout, settings.DEFAULT_TIMEOUT_SCHEDULE)
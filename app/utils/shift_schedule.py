@@ -0,0 +1,122 @@
+# app/utils/shift_schedule.py
+import bisect
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import event, select
+from app.core.config import settings
+from app.db import models
+from app.utils.table_versions import table_versions
+
+# Lightweight, detached copy of an active shift row
+CachedShift = namedtuple("CachedShift", ["id", "name", "start_time", "end_time", "is_active", "description"])
+
+def shift_to_response(shift):
+    """Serialize a shift the way the ShiftResponse schema expects it"""
+    return {
+        "id": shift.id,
+        "name": shift.name,
+        "start_time": shift.start_time.strftime("%H:%M:%S") if shift.start_time else None,
+        "end_time": shift.end_time.strftime("%H:%M:%S") if shift.end_time else None,
+        "is_active": shift.is_active,
+        "description": shift.description
+    }
+
+ACTIVE_SHIFTS = select(models.Shift).where(models.Shift.is_active == True)
+
+class ShiftSchedule:
+    """Process-local schedule of the active shifts.
+
+    Shifts are kept sorted by start time so "which shift contains time T" is a
+    binary search instead of a query. The serialized ShiftResponse payloads are
+    built once per load. The schedule is marked stale whenever a Shift row is
+    written through the ORM, when the "shift" table_version counter moves
+    past the one it was loaded at (so /attendance/shifts never pairs a new
+    ETag with an old body) and after SHIFT_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, ttl_seconds: int = settings.SHIFT_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._index = ([], [])
+        self._by_id = {}
+        self._payloads = []
+        self._payload_by_id = {}
+        self._loaded_at = None
+        self._version = None
+
+    @property
+    def is_stale(self):
+        return (
+            self._loaded_at is None
+            or self._version != table_versions.get("shift")
+            or time.monotonic() - self._loaded_at > self.ttl_seconds
+        )
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def _build(self, rows, version):
+        shifts = sorted(
+            (CachedShift(s.id, s.name, s.start_time, s.end_time, s.is_active, s.description) for s in rows),
+            key=lambda s: (s.start_time, s.id)
+        )
+        payloads = [shift_to_response(s) for s in shifts]
+
+        with self._lock:
+            self._index = ([s.start_time for s in shifts], shifts)
+            self._by_id = {s.id: s for s in shifts}
+            self._payloads = payloads
+            self._payload_by_id = {p["id"]: p for p in payloads}
+            self._loaded_at = time.monotonic()
+            self._version = version
+
+    def load(self, db):
+        """(Re)build the schedule from the active shifts in the database"""
+        # Read before the rows: a write landing in between reloads next time
+        version = table_versions.get("shift")
+        self._build(db.scalars(ACTIVE_SHIFTS).all(), version)
+
+    async def load_async(self, db):
+        """Same as load() for an AsyncSession"""
+        version = table_versions.get("shift")
+        self._build((await db.scalars(ACTIVE_SHIFTS)).all(), version)
+
+    def ensure_loaded(self, db):
+        if self.is_stale:
+            self.load(db)
+        return self
+
+    async def ensure_loaded_async(self, db):
+        if self.is_stale:
+            await self.load_async(db)
+        return self
+
+    def find(self, check_time):
+        """Return the active shift whose [start, end] contains check_time, or None"""
+        starts, shifts = self._index
+        index = bisect.bisect_right(starts, check_time) - 1
+
+        # Walk back in case of overlapping shifts; normally the first hit matches
+        while index >= 0:
+            if shifts[index].end_time >= check_time:
+                return shifts[index]
+            index -= 1
+        return None
+
+    def get(self, shift_id: int):
+        return self._by_id.get(shift_id)
+
+    def payloads(self):
+        return self._payloads
+
+    def payload(self, shift_id: int):
+        return self._payload_by_id.get(shift_id)
+
+shift_schedule = ShiftSchedule()
+
+def _invalidate_shift_schedule(mapper, connection, target):
+    shift_schedule.invalidate()
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(models.Shift, _event_name, _invalidate_shift_schedule)
@@ -0,0 +1,187 @@
+# app/utils/static_assets.py
+"""Fingerprinted, precompressed static assets.
+
+The build step copies STATIC_DIR to STATIC_BUILD_DIR, adding for every file
+a fingerprinted copy (css/app.css -> css/app.<content hash>.css) and, for
+text formats, .gz and .br (brotli, when installed) siblings compressed at
+the highest levels, since this happens once per deploy rather than per
+request. manifest.json maps each source path to its fingerprinted name:
+
+    python -m app.utils.static_assets [--source static] [--output static_build]
+
+When a build exists, /static serves it through PrecompressedStaticFiles:
+the client's Accept-Encoding picks the .br or .gz sibling, fingerprinted
+names are cached as immutable for a year and original names revalidate on
+every use. Templates link assets with {{ static_url("css/app.css") }} so
+each deploy's changed files get new URLs. Without a build, /static serves
+STATIC_DIR as before.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import shutil
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+from app.core.config import settings
+from app.utils.compression import brotli, choose_encoding
+
+MANIFEST_NAME = "manifest.json"
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Text formats worth compressing; images and woff2 fonts already are
+COMPRESSIBLE_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".map", ".json", ".svg", ".html", ".txt", ".xml",
+    ".ico", ".ttf", ".otf", ".eot", ".webmanifest",
+}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+def fingerprinted_name(path: str, data: bytes):
+    stem, ext = posixpath.splitext(path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+def _compressed_variants(path: str, data: bytes):
+    """{encoding: bytes} for the encodings that make the file meaningfully smaller"""
+    if posixpath.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return {}
+    # mtime=0 keeps rebuilds of the same file byte-identical
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data) * 0.9}
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def build_static(source: str = settings.STATIC_DIR, output: str = settings.STATIC_BUILD_DIR):
+    """Build the fingerprinted, precompressed copy of source into output; returns totals"""
+    if os.path.exists(output):
+        # Only ever wipe a previous build, never an unrelated directory
+        if os.listdir(output) and not os.path.exists(os.path.join(output, MANIFEST_NAME)):
+            raise ValueError(f"{output} exists and is not a static build")
+        shutil.rmtree(output)
+
+    files = {}
+    totals = {"files": 0, "bytes": 0, "gzip_bytes": 0, "br_bytes": 0}
+    for root, dirs, names in os.walk(source):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(names):
+            if name.startswith("."):
+                continue
+            full_path = os.path.join(root, name)
+            path = os.path.relpath(full_path, source).replace(os.sep, "/")
+            with open(full_path, "rb") as f:
+                data = f.read()
+
+            hashed = fingerprinted_name(path, data)
+            variants = _compressed_variants(path, data)
+            for served in (path, hashed):
+                _write(os.path.join(output, served), data)
+                for encoding, body in variants.items():
+                    _write(os.path.join(output, served + ENCODING_SUFFIXES[encoding]), body)
+
+            # Listed in order of preference, which breaks Accept-Encoding ties
+            files[path] = {"path": hashed, "encodings": [e for e in ENCODING_SUFFIXES if e in variants]}
+            totals["files"] += 1
+            totals["bytes"] += len(data)
+            totals["gzip_bytes"] += len(variants.get("gzip", data))
+            totals["br_bytes"] += len(variants.get("br", variants.get("gzip", data)))
+
+    _write(os.path.join(output, MANIFEST_NAME), json.dumps({"files": files}, indent=2, sort_keys=True).encode())
+    return totals
+
+class StaticManifest:
+    """Source path -> fingerprinted path and available encodings of a build"""
+
+    def __init__(self, directory: str = settings.STATIC_BUILD_DIR):
+        self.directory = directory
+        self.files = {}
+        self.load()
+
+    @property
+    def loaded(self):
+        return bool(self.files)
+
+    def load(self):
+        try:
+            with open(os.path.join(self.directory, MANIFEST_NAME)) as f:
+                self.files = json.load(f)["files"]
+        except FileNotFoundError:
+            self.files = {}
+        # Both names of a file are served, with the same encodings
+        self.encodings = {}
+        for path, entry in self.files.items():
+            self.encodings[path] = self.encodings[entry["path"]] = tuple(entry["encodings"])
+        self.immutable = {entry["path"] for entry in self.files.values()}
+        return self
+
+    def url(self, path: str):
+        """URL of a static file, fingerprinted when the build has it"""
+        path = path.lstrip("/")
+        entry = self.files.get(path)
+        return f"/static/{entry['path'] if entry else path}"
+
+static_manifest = StaticManifest()
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles over a build, serving .br/.gz siblings and immutable caching"""
+
+    def __init__(self, manifest: StaticManifest, **kwargs):
+        super().__init__(directory=manifest.directory, **kwargs)
+        self.manifest = manifest
+        # Build output doesn't change under a running process
+        self._variant_stats = {}
+
+    def _variant_stat(self, path: str):
+        stat_result = self._variant_stats.get(path)
+        if stat_result is None:
+            stat_result = self._variant_stats[path] = os.stat(path)
+        return stat_result
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        encodings = self.manifest.encodings.get(path, ())
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""), encodings) if status_code == 200 else None
+
+        if encoding:
+            variant = f"{full_path}{ENCODING_SUFFIXES[encoding]}"
+            response = FileResponse(
+                variant,
+                status_code=status_code,
+                stat_result=self._variant_stat(variant),
+                media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+                headers={"Content-Encoding": encoding},
+            )
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if encodings:
+            response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = (
+            IMMUTABLE_CACHE_CONTROL if path in self.manifest.immutable else REVALIDATE_CACHE_CONTROL
+        )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+def static_files():
+    """The /static app: the build when there is one, else STATIC_DIR as is"""
+    if static_manifest.loaded:
+        return PrecompressedStaticFiles(static_manifest)
+    # check_dir=False so the API can boot (e.g. for benchmarks) without a static/ folder
+    return StaticFiles(directory=settings.STATIC_DIR, check_dir=False)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress static assets")
+    parser.add_argument("--source", default=settings.STATIC_DIR)
+    parser.add_argument("--output", default=settings.STATIC_BUILD_DIR)
+    args = parser.parse_args()
+    print(build_static(args.source, args.output))
@@ -0,0 +1,146 @@
+# app/utils/table_versions.py
+"""Version ETags and conditional GET for reference data endpoints.
+
+Every write to a versioned table (shifts, states, pincodes, gyms) bumps
+that table's counter in table_version, in the same transaction: ORM
+flushes do it through a session event, Core writes call
+bump_table_versions() themselves. Workers keep a copy of the counters,
+dropped when they commit a versioned write and re-read after
+TABLE_VERSION_TTL_SECONDS to pick up other workers' writes.
+
+A route depending on conditional_get("gym") gets a weak ETag built from
+the counters of its tables, the app version and the query string. A
+request whose If-None-Match carries that tag is answered 304 with no body
+before the handler runs, so a dashboard reloading unchanged data costs no
+query and no payload.
+"""
+import hashlib
+import threading
+import time
+from fastapi import HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal, dialect_insert
+
+VERSIONED_TABLES = frozenset(
+    model.__tablename__ for model in (models.Shift, models.StateCountry, models.Pincode, models.Gym)
+)
+
+# Session.info key of the versioned tables written in the open transaction
+_CHANGED_TABLES = "changed_versioned_tables"
+
+class TableVersions:
+    """Process-local copy of the table_version counters"""
+
+    def __init__(self, ttl_seconds: int = settings.TABLE_VERSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._loaded_at = None
+
+    @property
+    def is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def load(self, db=None):
+        """(Re)read the counters, opening a session if none is given"""
+        query = select(models.TableVersion.table_name, models.TableVersion.version)
+        with self._lock:
+            if db is None:
+                with SessionLocal() as session:
+                    rows = session.execute(query).all()
+            else:
+                rows = db.execute(query).all()
+            self._versions = dict(rows)
+            self._loaded_at = time.monotonic()
+        return self
+
+    def get(self, table: str):
+        # A table never written since the counters were introduced is at 0
+        return self._versions.get(table, 0)
+
+table_versions = TableVersions()
+
+def bump_table_versions(db, tables):
+    """Increment the counters of tables in db's transaction.
+
+    ORM writes are covered by the flush listener below; call this after
+    Core inserts/updates/deletes on a versioned table.
+    """
+    tables = sorted(set(tables) & VERSIONED_TABLES)
+    if not tables:
+        return
+    insert = dialect_insert(db)
+    stmt = insert(models.TableVersion).values([{"table_name": table, "version": 1} for table in tables])
+    db.connection().execute(stmt.on_conflict_do_update(
+        index_elements=["table_name"],
+        set_={"version": models.TableVersion.version + 1}
+    ))
+    db.info.setdefault(_CHANGED_TABLES, set()).update(tables)
+
+def _bump_flushed_tables(session, flush_context):
+    # new/dirty/deleted still describe what was just flushed
+    tables = {
+        instance.__table__.name
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(instance, "__table__")
+    }
+    bump_table_versions(session, tables)
+
+def _after_commit(session):
+    if session.info.pop(_CHANGED_TABLES, None):
+        table_versions.invalidate()
+
+def _after_rollback(session):
+    session.info.pop(_CHANGED_TABLES, None)
+
+# Class-level, so AsyncSession (which wraps a Session) is covered too
+event.listen(Session, "after_flush", _bump_flushed_tables)
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
+
+def _cache_control():
+    if settings.REFERENCE_CACHE_MAX_AGE > 0:
+        return f"private, max-age={settings.REFERENCE_CACHE_MAX_AGE}"
+    return "private, no-cache"
+
+def _etag_matches(if_none_match: str, etag: str):
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" are the same tag
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+def conditional_get(*tables: str):
+    """Dependency answering 304 when the client's copy of tables is current.
+
+    Otherwise sets ETag and Cache-Control on the response and lets the
+    handler run. The tag covers the query string, so each page of a
+    paginated list is validated on its own.
+    """
+    unknown = set(tables) - VERSIONED_TABLES
+    if unknown:
+        raise ValueError(f"not versioned: {', '.join(sorted(unknown))}")
+
+    async def check(request: Request, response: Response):
+        if table_versions.is_stale:
+            await run_in_threadpool(table_versions.load)
+        versions = ".".join(f"{table}{table_versions.get(table)}" for table in tables)
+        digest = hashlib.blake2b(
+            f"{settings.PROJECT_VERSION}|{request.url.path}|{request.url.query}".encode(), digest_size=6
+        ).hexdigest()
+        etag = f'W/"{versions}-{digest}"'
+        headers = {"ETag": etag, "Cache-Control": _cache_control()}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return check
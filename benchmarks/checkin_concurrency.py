@@ -0,0 +1,187 @@
+# benchmarks/checkin_concurrency.py
+"""Concurrent check-in benchmark: sync Session vs AsyncSession time-in.
+
+Fires N concurrent time-in requests at the app through an in-process ASGI
+client and reports latency percentiles for two paths. While each burst runs, a
+probe polls ``/health`` to show how long unrelated requests are stalled.
+
+- "before": the old handler shape, an ``async def`` that queries through the
+  synchronous ``Session`` (every query blocks the event loop)
+- "after": the real ``POST /api/v1/attendance/time-in`` on ``AsyncSession``
+
+On a local SQLite file every statement returns in microseconds, which hides
+what the async port is for. ``--db-latency-ms`` adds a per-statement delay
+inside the driver (in whichever thread runs the statement) to model a
+database across the network.
+
+Usage (from the repository root):
+
+    python -m benchmarks.checkin_concurrency --concurrency 200 --db-latency-ms 2
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import statistics
+import tempfile
+import time
+
+# Point the app at a throwaway database before it is imported. Both URLs are
+# set outright: load_dotenv() never overrides variables already present, so
+# a .env (or the shell) can't aim the run at a real database
+_workdir = tempfile.mkdtemp(prefix="gym-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/bench.db"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_workdir}/bench.db"
+# The scheduler would write to the database in the middle of a run
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import event
+
+from app.main import app
+from app.db import models, schemas
+from app.db.database import SessionLocal, async_engine, engine, get_db
+from app.core.security import create_access_token
+
+
+def legacy_current_user(db=Depends(get_db)):
+    """The pre-JWT development mock: the first user, on the blocking Session"""
+    return db.query(models.User).first()
+
+
+async def legacy_time_in(
+    attendance_data: schemas.AttendanceCreate,
+    db=Depends(get_db),
+    current_user: models.User = Depends(legacy_current_user)
+):
+    """The pre-async time-in: read-then-insert on the blocking Session"""
+    shift = db.query(models.Shift).filter(
+        models.Shift.id == attendance_data.shift_id,
+        models.Shift.is_active == True
+    ).first()
+    existing = db.query(models.Attendance).filter(
+        models.Attendance.user_id == current_user.id,
+        models.Attendance.attendance_date == attendance_data.attendance_date,
+        models.Attendance.shift_id == shift.id
+    ).first()
+    if existing is None:
+        db.add(models.Attendance(
+            user_id=current_user.id,
+            shift_id=shift.id,
+            attendance_date=attendance_data.attendance_date,
+            time_in=datetime.datetime.utcnow(),
+            status='P'
+        ))
+        db.commit()
+    return {"message": "Time-in recorded successfully"}
+
+app.add_api_route("/bench/legacy/time-in", legacy_time_in, methods=["POST"])
+
+
+def add_db_latency(latency_ms):
+    """Sleep for latency_ms before every statement SQLite executes"""
+    delay = latency_ms / 1000
+
+    def trace(statement):
+        time.sleep(delay)
+
+    @event.listens_for(engine, "connect")
+    def sync_connect(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(trace)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def async_connect(dbapi_connection, connection_record):
+        dbapi_connection.run_async(lambda conn: conn.set_trace_callback(trace))
+
+
+def seed():
+    db = SessionLocal()
+    try:
+        if db.query(models.User).first() is None:
+            gym = models.Gym(gym_name="Bench Gym", gymID="BENCH001")
+            db.add(gym)
+            db.flush()
+            db.add(models.User(
+                gym_id=gym.id, email="owner@bench.local", password="x",
+                full_name="Bench Owner", member_id=1, pincode="560001",
+                is_owner=True, is_verified=True
+            ))
+            db.commit()
+    finally:
+        db.close()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_burst(client, path, concurrency, day_offset):
+    """Send `concurrency` check-ins at once, each for a distinct date"""
+    base_date = datetime.date(2000, 1, 1) + datetime.timedelta(days=day_offset)
+
+    async def one(i):
+        body = {"shift_id": 1, "attendance_date": (base_date + datetime.timedelta(days=i)).isoformat()}
+        started = time.perf_counter()
+        response = await client.post(path, json=body)
+        return time.perf_counter() - started, response.status_code
+
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/health")
+            probe_latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.005)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    latencies = [r[0] * 1000 for r in results]
+    errors = sum(1 for r in results if r[1] >= 400)
+    return {
+        "requests": concurrency,
+        "errors": errors,
+        "throughput_rps": round(concurrency / wall, 1),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "probe_p99_ms": round(percentile(probe_latencies, 99), 1) if probe_latencies else None,
+    }
+
+
+async def main(concurrency, rounds, db_latency_ms):
+    if db_latency_ms:
+        add_db_latency(db_latency_ms)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        seed()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'owner@bench.local'})}"}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            paths = {
+                "before (sync Session)": "/bench/legacy/time-in",
+                "after (AsyncSession)": "/api/v1/attendance/time-in",
+            }
+            for offset, (label, path) in enumerate(paths.items()):
+                for round_no in range(rounds):
+                    day_offset = (offset * rounds + round_no) * concurrency
+                    stats = await run_burst(client, path, concurrency, day_offset)
+                    print(f"{label:24} round {round_no + 1}: {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--db-latency-ms", type=float, default=0,
+                        help="simulated per-statement database latency")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.rounds, args.db_latency_ms))
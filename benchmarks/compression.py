@@ -0,0 +1,138 @@
+# benchmarks/compression.py
+"""Response compression: size saved vs CPU spent, per gzip level and brotli quality.
+
+Payloads are the HTML templates as served and JSON lists shaped like the
+users and attendance responses (``--rows`` each, encoded by
+app.utils.fast_json). Every payload is compressed with each gzip level and
+brotli quality in ``--gzip-levels`` / ``--brotli-qualities`` (brotli only
+when installed), reporting:
+
+- compressed size as a share of the original
+- compression time per response (median of ``--repeat``) and throughput
+- time to deliver over each ``--links`` bandwidth (Mbit/s): compression
+  time plus transfer time of the compressed body; "none" is the
+  uncompressed transfer
+
+GZIP_LEVEL and BROTLI_QUALITY trade the second column against the last.
+
+Usage (from the repository root):
+
+    python -m benchmarks.compression --rows 100 1000 5000 --links 1.5 10
+"""
+import argparse
+import datetime
+import glob
+import os
+import random
+import statistics
+import time
+
+from app.utils import compression
+from app.utils.fast_json import dumps
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+
+
+def users_payload(rows, rng):
+    created = datetime.datetime(2025, 1, 1)
+    return dumps([
+        {
+            "email": f"member{i}@example.com", "full_name": f"Member {rng.choice('ABCDEFGHJK')}{i}",
+            "member_id": 1000 + i, "address": f"{rng.randrange(1, 400)} {rng.choice(['MG', 'Station', 'Lake'])} Road",
+            "district": rng.choice(["Bengaluru Urban", "Mysuru", "Chennai", "Pune"]),
+            "state_ut": rng.choice(["Karnataka", "Tamil Nadu", "Maharashtra"]),
+            "pincode": f"{rng.randrange(110000, 860000)}", "phone": f"9{rng.randrange(10**9):09d}",
+            "id": i, "gym_id": 1 + i % 10,
+            "created_at": (created + datetime.timedelta(seconds=rng.randrange(10**7))).isoformat(),
+            "is_member": True, "is_trainer": rng.random() < 0.02, "is_owner": False,
+            "is_active": rng.random() < 0.95, "is_verified": rng.random() < 0.97,
+        }
+        for i in range(rows)
+    ])
+
+
+def attendance_payload(rows, rng):
+    day = datetime.date(2026, 6, 30)
+    items = []
+    for i in range(rows):
+        present = rng.random() < 0.4
+        time_in = datetime.datetime.combine(day, datetime.time(rng.randrange(5, 22), rng.randrange(60), rng.randrange(60)))
+        stamp = time_in.isoformat()
+        items.append({
+            "shift_id": 1 + i % 2, "attendance_date": day.isoformat(), "id": 10**6 - i,
+            "user_id": rng.randrange(1, 7000),
+            "time_in": stamp if present else None,
+            "time_out": (time_in + datetime.timedelta(minutes=rng.randrange(20, 180), microseconds=rng.randrange(10**6))).isoformat() if present else None,
+            "status": "P" if present else "A", "timeout_default": present and rng.random() < 0.05,
+            "created_at": stamp, "updated_at": stamp,
+        })
+        if i % 50 == 49:
+            day -= datetime.timedelta(days=1)
+    return dumps(items)
+
+
+def payloads(rows_list):
+    rng = random.Random(1)
+    found = {}
+    for name in ("login.html", "dashboard.html", "attendance_dashboard.html"):
+        path = os.path.join(TEMPLATES_DIR, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                found[name] = f.read()
+    if not found:
+        for path in sorted(glob.glob(os.path.join(TEMPLATES_DIR, "*.html")))[:3]:
+            with open(path, "rb") as f:
+                found[os.path.basename(path)] = f.read()
+    for rows in rows_list:
+        found[f"users x{rows}"] = users_payload(rows, rng)
+        found[f"attendance x{rows}"] = attendance_payload(rows, rng)
+    return found
+
+
+def time_compress(data, encoding, level, repeat):
+    kwargs = {"brotli_quality": level} if encoding == "br" else {"gzip_level": level}
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = compression.compress(data, encoding, **kwargs)
+        timings.append(time.perf_counter() - started)
+    return body, statistics.median(timings)
+
+
+def transfer_ms(size, mbit):
+    return size * 8 / (mbit * 1e6) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--gzip-levels", type=int, nargs="+", default=[1, 4, 6, 9])
+    parser.add_argument("--brotli-qualities", type=int, nargs="+", default=[1, 3, 4, 5, 7, 11])
+    parser.add_argument("--links", type=float, nargs="+", default=[1.5, 10.0], help="link speeds in Mbit/s")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    settings = [("gzip", level) for level in args.gzip_levels]
+    if compression.brotli is not None:
+        settings += [("br", quality) for quality in args.brotli_qualities]
+    else:
+        print("brotli not installed: gzip only\n")
+
+    link_headers = "".join(f" {f'@{link:g}Mb ms':>11}" for link in args.links)
+    for name, data in payloads(args.rows).items():
+        print(f"{name}: {len(data) / 1024:,.1f} KiB")
+        print(f"  {'encoding':10} {'size':>7} {'cpu ms':>8} {'MB/s':>7}{link_headers}")
+        none_times = "".join(f" {transfer_ms(len(data), link):11.1f}" for link in args.links)
+        print(f"  {'none':10} {'100%':>7} {0:8.2f} {'':>7}{none_times}")
+        for encoding, level in settings:
+            body, seconds = time_compress(data, encoding, level, args.repeat)
+            deliver = "".join(f" {seconds * 1000 + transfer_ms(len(body), link):11.1f}" for link in args.links)
+            print(
+                f"  {f'{encoding}-{level}':10} {len(body) / len(data):7.1%} {seconds * 1000:8.2f}"
+                f" {len(data) / seconds / 1e6:7.0f}{deliver}"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# benchmarks/json_serialization.py
+"""List response serialization: ORM objects + response_model vs column rows + fast_json.
+
+Seeds a throwaway SQLite database with ``--users`` users and ``--rows``
+attendance rows, then serves the same users and attendance lists from two
+routes each on a bare FastAPI app:
+
+- "response_model": select the ORM entity, return the objects and let
+  FastAPI validate them into the schema (from_attributes) and dump them,
+  as the list endpoints did before
+- "fast_json": select the schema's columns as row tuples and return
+  ``rows_response()`` (orjson when installed), as they do now
+
+Each route is called through an in-process ASGI client with
+``limit=--page-size``; the best and median of ``--repeat`` calls are
+reported, after checking both variants return byte-identical bodies
+(the seeded emails are already in EmailStr's normalized form; see
+app/utils/fast_json.py for rows that are not).
+
+Usage (from the repository root):
+
+    python -m benchmarks.json_serialization --rows 20000 --page-size 5000
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# Set outright: load_dotenv() won't override them with a real database
+_workdir = tempfile.mkdtemp(prefix="gym-json-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/json.db"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_workdir}/json.db"
+# Large pages are the point of the benchmark
+os.environ.setdefault("PAGE_SIZE_MAX", "50000")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db import models, schemas
+from app.db.database import Base, SessionLocal, engine, get_async_db, get_db
+from app.utils import fast_json
+from app.utils.fast_json import rows_response, schema_columns
+from app.utils.pagination import Page
+
+USER_COLUMNS = schema_columns(models.User, schemas.User)
+ATTENDANCE_COLUMNS = schema_columns(models.Attendance, schemas.Attendance)
+ATTENDANCE_PAGE_KEYS = [models.Attendance.attendance_date, models.Attendance.id]
+
+app = FastAPI()
+
+@app.get("/response_model/users", response_model=list[schemas.User])
+def users_response_model(page: Page = Depends(), db: Session = Depends(get_db)):
+    return page.finish(page.apply(db.query(models.User), [models.User.id]).all())
+
+@app.get("/fast_json/users", response_model=list[schemas.User])
+def users_fast_json(page: Page = Depends(), db: Session = Depends(get_db)):
+    return rows_response(db.execute(page.apply(select(*USER_COLUMNS), [models.User.id])).all(), page)
+
+@app.get("/response_model/attendance", response_model=list[schemas.Attendance])
+async def attendance_response_model(page: Page = Depends(), db: AsyncSession = Depends(get_async_db)):
+    query = page.apply(select(models.Attendance), ATTENDANCE_PAGE_KEYS, descending=True)
+    return page.finish((await db.scalars(query)).all())
+
+@app.get("/fast_json/attendance", response_model=list[schemas.Attendance])
+async def attendance_fast_json(page: Page = Depends(), db: AsyncSession = Depends(get_async_db)):
+    query = page.apply(select(*ATTENDANCE_COLUMNS), ATTENDANCE_PAGE_KEYS, descending=True)
+    return rows_response((await db.execute(query)).all(), page)
+
+
+def seed(users, rows):
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(1)
+    now = datetime.datetime(2025, 1, 1)
+    db = SessionLocal()
+    try:
+        gym = models.Gym(gym_name="JSON Bench Gym", gymID="JSON0001")
+        db.add(gym)
+        db.flush()
+        db.execute(insert(models.User), [
+            {
+                "gym_id": gym.id, "email": f"member{i}@bench.example.com", "password": "x",
+                "full_name": f"Member {i}", "member_id": i, "pincode": "560001",
+                "address": f"{i} Main Road", "phone": f"98{i:08d}", "is_member": True,
+                "is_verified": True, "is_active": True, "created_at": now + datetime.timedelta(seconds=i),
+            }
+            for i in range(users)
+        ])
+        attendance = []
+        for i in range(rows):
+            time_in = now + datetime.timedelta(days=i // users, minutes=rng.randrange(1440), microseconds=rng.randrange(10**6))
+            present = rng.random() < 0.6
+            attendance.append({
+                "user_id": 1 + i % users, "shift_id": 1 + i % 2, "attendance_date": time_in.date(),
+                "time_in": time_in if present else None,
+                "time_out": time_in + datetime.timedelta(minutes=70) if present else None,
+                "status": "P" if present else "A", "timeout_default": False,
+                "created_at": time_in, "updated_at": time_in,
+            })
+        db.execute(insert(models.Attendance), attendance)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def measure(client, path, page_size, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(path, params={"limit": page_size})
+        timings.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+    return response, timings
+
+
+async def run(args):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for endpoint in ("users", "attendance"):
+            results = {}
+            for variant in ("response_model", "fast_json"):
+                # One unmeasured call warms the pool, statement cache and schema
+                await client.get(f"/{variant}/{endpoint}", params={"limit": 10})
+                results[variant] = await measure(client, f"/{variant}/{endpoint}", args.page_size, args.repeat)
+
+            (slow, slow_ms), (fast, fast_ms) = results["response_model"], results["fast_json"]
+            if slow.content != fast.content:
+                raise SystemExit(f"{endpoint}: response bodies differ")
+            if slow.headers.get("x-next-cursor") != fast.headers.get("x-next-cursor"):
+                raise SystemExit(f"{endpoint}: X-Next-Cursor differs")
+
+            rows = len(fast.json())
+            print(f"{endpoint}: {rows} rows, {len(fast.content) / 1024:.0f} KiB, identical bodies")
+            for variant, timings in (("response_model", slow_ms), ("fast_json", fast_ms)):
+                print(
+                    f"  {variant:15} best {min(timings):7.1f} ms  median {statistics.median(timings):7.1f} ms"
+                    f"  ({rows / min(timings) * 1000:,.0f} rows/s)"
+                )
+            print(f"  speedup (median) x{statistics.median(slow_ms) / statistics.median(fast_ms):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=6000)
+    parser.add_argument("--rows", type=int, default=20000, help="attendance rows")
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    seed(args.users, args.rows)
+    print(f"encoder: {'orjson' if fast_json.orjson is not None else 'json (orjson not installed)'}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
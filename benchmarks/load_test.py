@@ -0,0 +1,330 @@
+# benchmarks/load_test.py
+"""Mixed-workload load test of the API through an in-process ASGI client.
+
+Boots ``app.main:app`` (startup and shutdown hooks included) against a freshly
+seeded SQLite database: one gym, an owner, ``--members`` verified members
+sharing one bcrypt hash, and ``--history-days`` days of past attendance.
+``--concurrency`` virtual users then loop for ``--duration`` seconds, each
+picking its next request from the weighted ``--mix``:
+
+- ``login``: POST /api/v1/auth/login as a random member (bcrypt verify)
+- ``time_in`` / ``time_out``: a member's check-in, later followed by the
+  matching check-out for the current shift
+- ``attendance_admin``: GET /api/v1/attendance/admin as the owner, one page
+- ``users``: GET /api/v1/users/, one page
+
+Every random choice comes from ``--seed``, so two runs of the same commit
+issue the same request sequence per virtual user. Throughput and
+p50/p95/p99 latency are reported per endpoint and written as JSON (with
+the git commit and settings) so runs can be compared across commits.
+
+Usage (from the repository root):
+
+    python -m benchmarks.load_test --concurrency 50 --duration 15
+    python -m benchmarks.load_test --compare benchmarks/results/<earlier run>.json
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+
+# Point the app at a throwaway database before it is imported. Both URLs are
+# set outright: load_dotenv() never overrides variables already present, so
+# a .env (or the shell) can't aim the run at a real database
+_workdir = tempfile.mkdtemp(prefix="gym-load-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/load.db"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_workdir}/load.db"
+# The scheduler would write to the database in the middle of a run
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+
+import httpx
+import sqlalchemy
+from sqlalchemy import insert
+
+from app.main import app
+from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash
+from app.db import models
+from app.db.database import Base, SessionLocal, engine
+from app.utils.attendance_tasks import get_current_indian_time
+
+PASSWORD = "bench-password"
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEFAULT_MIX = "login=1,time_in=2,time_out=2,attendance_admin=3,users=2"
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown operations: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def seed(members, history_days):
+    """Create the dataset; returns (owner email, member ids by email)"""
+    Base.metadata.create_all(bind=engine)
+    password = get_password_hash(PASSWORD)
+    now = datetime.datetime.utcnow()
+    db = SessionLocal()
+    try:
+        gym = models.Gym(gym_name="Load Test Gym", gymID="LOAD0001")
+        db.add(gym)
+        db.flush()
+        db.execute(insert(models.User), [
+            {
+                "gym_id": gym.id, "email": f"member{i}@load.example.com", "password": password,
+                "full_name": f"Member {i}", "member_id": i, "pincode": "560001",
+                "is_owner": i == 0, "is_member": i != 0, "is_verified": True, "is_active": True,
+                "created_at": now,
+            }
+            for i in range(members + 1)
+        ])
+        user_ids = [user_id for (user_id,) in db.query(models.User.id).order_by(models.User.id)]
+        today = get_current_indian_time().date()
+        for day in range(1, history_days + 1):
+            db.execute(insert(models.Attendance), [
+                {
+                    "user_id": user_id, "shift_id": 1 + (user_id % 2),
+                    "attendance_date": today - datetime.timedelta(days=day),
+                    "status": "P" if (user_id + day) % 4 else "A",
+                    "timeout_default": False, "created_at": now, "updated_at": now,
+                }
+                for user_id in user_ids[1:]
+            ])
+        db.commit()
+    finally:
+        db.close()
+    return "member0@load.example.com", [f"member{i}@load.example.com" for i in range(1, members + 1)]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = collections.defaultdict(list)
+        self.statuses = collections.defaultdict(collections.Counter)
+
+    def record(self, name, seconds, status_code):
+        self.samples[name].append(seconds * 1000)
+        self.statuses[name][f"{status_code // 100}xx"] += 1
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, statuses, wall):
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / wall, 1),
+        "mean_ms": round(statistics.fmean(samples), 2),
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+        "p99_ms": round(percentile(samples, 99), 2),
+        "max_ms": round(max(samples), 2),
+        "status": dict(sorted(statuses.items())),
+    }
+
+
+class Workload:
+    """Shared state of a run: tokens, members waiting to check in or out, the current shift"""
+
+    def __init__(self, client, owner, members):
+        self.client = client
+        self.owner_headers = {"Authorization": f"Bearer {create_access_token({'sub': owner})}"}
+        self.tokens = {email: create_access_token({"sub": email}) for email in members}
+        self.members = members
+        self.checked_out = collections.deque(members)
+        self.checked_in = collections.deque()
+        # Time-out finds the shift by the time given, so send one inside the time-in shift
+        self.shift_id = 1
+        self.time_out = None
+
+    async def prepare(self):
+        response = await self.client.get("/api/v1/attendance/shifts")
+        shift = next(s for s in response.json() if s["id"] == self.shift_id)
+        start = datetime.time.fromisoformat(shift["start_time"])
+        self.time_out = datetime.datetime.combine(get_current_indian_time().date(), start).isoformat()
+
+    def member_headers(self, email):
+        return {"Authorization": f"Bearer {self.tokens[email]}"}
+
+
+async def op_login(work, rng):
+    email = rng.choice(work.members)
+    return await work.client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+
+
+async def op_time_in(work, rng):
+    # Members check in once; after everyone has, repeats exercise the idempotent path
+    email = work.checked_out.popleft() if work.checked_out else rng.choice(work.members)
+    response = await work.client.post(
+        "/api/v1/attendance/time-in", json={"shift_id": work.shift_id}, headers=work.member_headers(email)
+    )
+    # Only once the row exists, or a fast time-out could overtake it
+    work.checked_in.append(email)
+    return response
+
+
+async def op_time_out(work, rng):
+    if not work.checked_in:
+        return await op_time_in(work, rng)
+    email = work.checked_in.popleft()
+    return await work.client.post(
+        "/api/v1/attendance/time-out", json={"time_out": work.time_out}, headers=work.member_headers(email)
+    )
+
+
+async def op_attendance_admin(work, rng):
+    return await work.client.get("/api/v1/attendance/admin", params={"limit": 50}, headers=work.owner_headers)
+
+
+async def op_users(work, rng):
+    return await work.client.get("/api/v1/users/", params={"limit": 50, "skip": rng.randrange(0, 200)})
+
+
+OPERATIONS = {
+    "login": op_login,
+    "time_in": op_time_in,
+    "time_out": op_time_out,
+    "attendance_admin": op_attendance_admin,
+    "users": op_users,
+}
+
+
+async def virtual_user(work, recorder, mix, rng, deadline):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        response = await OPERATIONS[name](work, rng)
+        recorder.record(name, time.perf_counter() - started, response.status_code)
+
+
+async def run(args):
+    owner, members = seed(args.members, args.history_days)
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+            work = Workload(client, owner, members)
+            await work.prepare()
+
+            if args.warmup:
+                warm_deadline = time.perf_counter() + args.warmup
+                await asyncio.gather(*(
+                    virtual_user(work, Recorder(), {"users": 1, "attendance_admin": 1}, random.Random(i), warm_deadline)
+                    for i in range(min(args.concurrency, 8))
+                ))
+
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(
+                virtual_user(work, recorder, args.mix, random.Random(args.seed * 100003 + i), deadline)
+                for i in range(args.concurrency)
+            ))
+            wall = time.perf_counter() - started
+
+    endpoints = {
+        name: summarize(recorder.samples[name], recorder.statuses[name], wall)
+        for name in sorted(recorder.samples)
+    }
+    all_samples = [sample for samples in recorder.samples.values() for sample in samples]
+    all_statuses = sum(recorder.statuses.values(), collections.Counter())
+    return {"endpoints": endpoints, "total": summarize(all_samples, all_statuses, wall), "wall_seconds": round(wall, 2)}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result, baseline=None):
+    header = f"{'endpoint':18} {'requests':>8} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status"
+    print(header)
+    print("-" * len(header))
+    rows = {**result["endpoints"], "TOTAL": result["total"]}
+    for name, stats in rows.items():
+        print(
+            f"{name:18} {stats['requests']:>8} {stats['throughput_rps']:>8} {stats['p50_ms']:>8} "
+            f"{stats['p95_ms']:>8} {stats['p99_ms']:>8}  {stats['status']}"
+        )
+    if baseline:
+        print(f"\nchange vs {baseline['meta']['commit']} ({baseline['meta']['started_at']}):")
+        old_rows = {**baseline["endpoints"], "TOTAL": baseline["total"]}
+        for name, stats in rows.items():
+            old = old_rows.get(name)
+            if not old:
+                continue
+            changes = [
+                f"{key} {(stats[key] - old[key]) / old[key] * 100:+.1f}%"
+                for key in ("throughput_rps", "p50_ms", "p99_ms") if old[key]
+            ]
+            print(f"{name:18} {', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=15, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds of unmeasured reads first")
+    parser.add_argument("--members", type=int, default=2000)
+    parser.add_argument("--history-days", type=int, default=30)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help=f"default: {DEFAULT_MIX}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/load_test_<commit>_<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to print changes against")
+    args = parser.parse_args()
+    if isinstance(args.mix, str):
+        args.mix = parse_mix(args.mix)
+
+    started_at = datetime.datetime.now().replace(microsecond=0)
+    result = asyncio.run(run(args))
+    commit = git_commit()
+    result = {
+        "meta": {
+            "commit": commit,
+            "started_at": started_at.isoformat(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+            "password_hash_workers": settings.PASSWORD_HASH_WORKERS,
+        },
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        **result,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load_test_{commit or 'nogit'}_{started_at:%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nresults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
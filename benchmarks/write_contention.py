@@ -0,0 +1,133 @@
+# benchmarks/write_contention.py
+"""SQLite write contention benchmark: default engine vs create_db_engine().
+
+Runs W writer threads, each committing short check-in transactions (one
+attendance insert per commit), alongside R reader threads polling the day's
+attendance count, against a fresh database file per engine configuration:
+
+- "default": ``create_engine(url, connect_args={"check_same_thread": False})``,
+  the engine this app used before (rollback journal, synchronous=FULL)
+- "tuned": ``app.db.database.create_db_engine()`` (WAL, busy_timeout,
+  synchronous=NORMAL, larger page cache)
+
+Reports committed writes per second, commit latency percentiles, failed
+transactions ("database is locked") and reader throughput.
+
+Usage (from the repository root):
+
+    python -m benchmarks.write_contention --writers 16 --readers 4 --seconds 5
+"""
+import argparse
+import datetime
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+# Set outright: load_dotenv() won't override them with a real database
+_workdir = tempfile.mkdtemp(prefix="gym-contention-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/app.db"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_workdir}/app.db"
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.database import Base, create_db_engine, pool_stats
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(label, db_engine, writers, readers, seconds):
+    Base.metadata.create_all(bind=db_engine)
+    Session = sessionmaker(bind=db_engine, autoflush=False)
+    stop = threading.Event()
+    latencies = []
+    failures = [0]
+    reads = [0]
+    lock = threading.Lock()
+    today = datetime.date(2024, 1, 1)
+
+    def writer(user_id):
+        day = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            db = Session()
+            try:
+                db.execute(insert(models.Attendance).values(
+                    user_id=user_id, shift_id=1,
+                    attendance_date=today + datetime.timedelta(days=day),
+                    time_in=datetime.datetime.utcnow(), status='P'
+                ))
+                db.commit()
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    failures[0] += 1
+            finally:
+                db.close()
+            day += 1
+
+    def reader():
+        while not stop.is_set():
+            db = Session()
+            try:
+                db.scalar(select(func.count()).select_from(models.Attendance).where(
+                    models.Attendance.attendance_date == today
+                ))
+                with lock:
+                    reads[0] += 1
+            except OperationalError:
+                pass
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer, args=(i + 1,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    stats = {
+        "writes_per_s": round(len(latencies) / seconds),
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 1) if latencies else None,
+        "failed": failures[0],
+        "reads_per_s": round(reads[0] / seconds),
+    }
+    print(f"{label:8} {stats}")
+    print(f"{'':8} pool: {pool_stats(db_engine)['status']}")
+    db_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    # Enough pooled connections for every thread, so the pool isn't the bottleneck
+    pool_size = args.writers + args.readers
+    configs = {
+        "default": lambda url: create_engine(url, connect_args={"check_same_thread": False}, pool_size=pool_size),
+        "tuned": lambda url: create_db_engine(url, pool_size=pool_size),
+    }
+    for label, factory in configs.items():
+        db_engine = factory(f"sqlite:///{_workdir}/{label}.db")
+        run(label, db_engine, args.writers, args.readers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()